@@ -1,15 +1,19 @@
 #!/usr/bin/env -S uv run --quiet
 # /// script
 # requires-python = ">=3.10"
-# dependencies = []
+# dependencies = [
+#     "msgspec; platform_python_implementation == 'CPython'",
+#     "orjson; platform_python_implementation == 'CPython'",
+# ]
 # ///
 """
 merge_edges.py - Merge and validate edge files from sub-agents.
 
 Usage:
-    uv run merge_edges.py --input-dir <dir> --output <edges.json> [--validate]
+    uv run merge_edges.py --input-dir <dir> --output <edges.json> [--validate] [--format json|ndjson]
 
-Merges individual edge JSON files into a single edges.json file.
+Merges individual edge JSON files into a single edges.json file (or, with
+--format ndjson, a newline-delimited file with one edge object per line).
 Each input file should have the format:
 {
   "source": "path/to/agent.md",
@@ -18,36 +22,172 @@ Each input file should have the format:
     ...
   ]
 }
+
+The script also runs unchanged on PyPy, whose JIT speeds up the pure-Python
+fallback paths:
+    uv run --python pypy@3.10 merge_edges.py --input-dir <dir> --output <edges.json>
 """
 
 import argparse
+import contextlib
 import json
+import mmap
+import os
+import platform
 import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Literal, TypedDict
+
+# The C-extension parsers are used on CPython only; on PyPy they are slow
+# (or unavailable) and the JIT-compiled stdlib json path is faster.
+msgspec = None
+orjson = None
+if platform.python_implementation() == "CPython":
+    try:
+        import msgspec
+    except ImportError:
+        pass
+
+    try:
+        import orjson
+    except ImportError:
+        pass
+
+
+# Reused stdlib codecs for when orjson is unavailable. Edges are flat dicts,
+# so the circular-reference check is unnecessary, and non-ASCII text is
+# written as UTF-8 (matching orjson) instead of being escaped.
+_JSON_DECODER = json.JSONDecoder()
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False)
+
+# Allowed values for an edge's "type" field
+VALID_EDGE_TYPES = frozenset({"agent-doc", "file", "directory"})
+
+
+class _Edge(TypedDict):
+    source: str
+    target: str
+    type: Literal["agent-doc", "file", "directory"]
+
+
+class _EdgeFile(TypedDict):
+    source: str
+    edges: list[_Edge]
+
+
+# Byte values used by the pre-parse shape check
+JSON_WHITESPACE = b" \t\n\r"
+OPEN_BRACE = ord("{")
+CLOSE_BRACE = ord("}")
+
+# Maximum files read concurrently in --threads mode
+READ_CONCURRENCY = 64
+
+# Number of files between flushes of buffered --verbose output
+VERBOSE_FLUSH_EVERY = 256
+
+# Below this many files, worker start-up and pickling outweigh the
+# validation work, so the default mode validates them in-process
+PROCESS_POOL_MIN_FILES = 32
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_MIN_BYTES = 1 << 16
 
+def _loads(content: bytes | memoryview):
+    """Parse JSON bytes, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(content)
+    if isinstance(content, memoryview):
+        content = content.tobytes()
+    return _JSON_DECODER.decode(content.decode("utf-8"))
 
-def validate_edge_file(file_path: Path) -> tuple[dict | None, list[str]]:
+
+def _dumps(data) -> bytes:
+    """Serialize data as compact JSON bytes, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _JSON_ENCODER.encode(data).encode("utf-8")
+
+
+def _read_bytes(file_path: str) -> bytes:
+    """Read a whole file with raw os calls, skipping the buffered file object."""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        while chunk := os.read(fd, max(size, 1 << 16)):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+def _quick_shape_ok(content: bytes | memoryview) -> bool:
     """
-    Validate a single edge file.
+    Cheaply check that content is wrapped in { ... }.
 
-    Returns:
-        tuple of (parsed_data or None, list of error messages)
+    Rejects empty files, non-object roots, and output truncated mid-write
+    without running the JSON parser over the whole buffer.
     """
-    errors = []
+    start, end = 0, len(content) - 1
+    while start <= end and content[start] in JSON_WHITESPACE:
+        start += 1
+    while end > start and content[end] in JSON_WHITESPACE:
+        end -= 1
+    return end > start and content[start] == OPEN_BRACE and content[end] == CLOSE_BRACE
+
+
+def _validate_edges(edges: list) -> list[str]:
+    """Check each edge object for the required fields and a known type."""
+    errors: list[str] = []
+    for i, edge in enumerate(edges):
+        if not isinstance(edge, dict):
+            errors.append(f"Edge {i}: must be an object")
+            continue
+        if "source" not in edge:
+            errors.append(f"Edge {i}: missing 'source'")
+        if "target" not in edge:
+            errors.append(f"Edge {i}: missing 'target'")
+        if "type" not in edge:
+            errors.append(f"Edge {i}: missing 'type'")
+        elif not isinstance(edge["type"], str) or edge["type"] not in VALID_EDGE_TYPES:
+            errors.append(f"Edge {i}: 'type' must be 'agent-doc', 'file', or 'directory'")
+    return errors
+
+
+def _validate_content(content: bytes | memoryview) -> tuple[dict | None, list[str]]:
+    """
+    Parse and validate the raw contents of an edge file.
 
-    try:
-        content = file_path.read_text()
-    except Exception as e:
-        errors.append(f"Could not read file: {e}")
+    The file is parsed once with _loads, so fields outside the schema are
+    kept. When msgspec is available, the parsed data is checked against the
+    schema in a single C pass; data it rejects falls through to the detailed
+    checks below so every error can be reported.
+    """
+    errors: list[str] = []
+
+    if not _quick_shape_ok(content):
+        errors.append("Truncated file or root is not an object")
         return None, errors
 
     # Try to parse JSON
     try:
-        data = json.loads(content)
-    except json.JSONDecodeError as e:
+        data = _loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
         errors.append(f"Invalid JSON: {e}")
         return None, errors
 
+    # Fast path: schema-typed validation of the parsed data
+    if msgspec is not None:
+        try:
+            msgspec.convert(data, _EdgeFile)
+        except msgspec.ValidationError:
+            pass
+        else:
+            return data, []
+
     # Validate structure
     if not isinstance(data, dict):
         errors.append("Root must be an object")
@@ -63,18 +203,7 @@ def validate_edge_file(file_path: Path) -> tuple[dict | None, list[str]]:
     elif not isinstance(data["edges"], list):
         errors.append("'edges' must be an array")
     else:
-        for i, edge in enumerate(data["edges"]):
-            if not isinstance(edge, dict):
-                errors.append(f"Edge {i}: must be an object")
-                continue
-            if "source" not in edge:
-                errors.append(f"Edge {i}: missing 'source'")
-            if "target" not in edge:
-                errors.append(f"Edge {i}: missing 'target'")
-            if "type" not in edge:
-                errors.append(f"Edge {i}: missing 'type'")
-            elif edge.get("type") not in ("agent-doc", "file", "directory"):
-                errors.append(f"Edge {i}: 'type' must be 'agent-doc', 'file', or 'directory'")
+        errors.extend(_validate_edges(data["edges"]))
 
     if errors:
         return None, errors
@@ -82,48 +211,203 @@ def validate_edge_file(file_path: Path) -> tuple[dict | None, list[str]]:
     return data, []
 
 
-def merge_edge_files(input_dir: Path, validate: bool = False, verbose: bool = False) -> tuple[dict, dict]:
+def validate_edge_file(file_path: str) -> tuple[dict | None, list[str]]:
     """
-    Merge all edge JSON files in a directory.
+    Validate a single edge file.
+
+    Files of MMAP_MIN_BYTES or more are memory-mapped and parsed in place
+    rather than copied into a bytes object first.
 
     Returns:
-        tuple of (merged_data, summary)
+        tuple of (parsed_data or None, list of error messages)
+    """
+    try:
+        if os.stat(file_path).st_size < MMAP_MIN_BYTES:
+            return _validate_content(_read_bytes(file_path))
+        with (
+            open(file_path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            memoryview(mm) as view,
+        ):
+            return _validate_content(view)
+    except OSError as e:
+        return None, [f"Could not read file: {e}"]
+
+
+def _discard(_item) -> None:
+    """No-op sink used when validation errors are not being reported."""
+
+
+def iter_edge_files(
+    input_dir: Path,
+    summary: dict,
+    validate: bool = False,
+    verbose: bool = False,
+    threads: bool = False,
+) -> Iterator[list]:
+    """
+    Validate all edge JSON files in a directory, yielding each valid edge list.
+
+    Files are validated in parallel (processes by default, threads if
+    requested); without threads, fewer than PROCESS_POOL_MIN_FILES files
+    are validated in-process. Results are consumed in sorted file order so
+    the merged output is deterministic. Counters and errors are added to
+    summary once the generator is exhausted.
+    """
+    # Find all JSON files in the input directory (scandir avoids a Path per entry)
+    with os.scandir(input_dir) as it:
+        json_files = sorted(e.path for e in it if e.name.endswith(".json") and e.is_file())
+
+    if threads:
+        # Threads mostly wait on reads, so keep many in flight (bounded to cap
+        # open file descriptors) to overlap I/O latency on slow filesystems
+        workers = max(1, min(READ_CONCURRENCY, len(json_files)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+    elif len(json_files) >= PROCESS_POOL_MIN_FILES:
+        workers = os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = None
+
+    # Tallied in locals and written back to summary once the files are consumed
+    files_processed = files_valid = files_invalid = total_edges = 0
+    validation_errors: list[tuple[str, list[str]]] = []
+    # Chosen once so the loop does not re-test the validate flag per file
+    record_errors = validation_errors.append if validate else _discard
+    # Verbose lines are buffered and written to stderr in batches
+    log: list[str] = []
+
+    try:
+        with executor if executor is not None else contextlib.nullcontext():
+            if executor is None:
+                results = map(validate_edge_file, json_files)
+            else:
+                chunksize = max(1, len(json_files) // (4 * workers))
+                results = executor.map(validate_edge_file, json_files, chunksize=chunksize)
+            for file_path, (data, errors) in zip(json_files, results):
+                name = os.path.basename(file_path)
+                files_processed += 1
+
+                if errors:
+                    files_invalid += 1
+                    record_errors((name, errors))
+                    if verbose:
+                        log.append(f"Processing: {name}\n  -> INVALID ({len(errors)} errors)\n")
+                else:
+                    files_valid += 1
+                    edges = data.get("edges", [])
+                    total_edges += len(edges)
+                    if verbose:
+                        log.append(f"Processing: {name}\n  -> OK ({len(edges)} edges)\n")
+                    yield edges
+
+                if len(log) >= VERBOSE_FLUSH_EVERY:
+                    sys.stderr.write("".join(log))
+                    log.clear()
+    finally:
+        if log:
+            sys.stderr.write("".join(log))
+        summary["files_processed"] += files_processed
+        summary["files_valid"] += files_valid
+        summary["files_invalid"] += files_invalid
+        summary["total_edges"] += total_edges
+        summary["validation_errors"].update(validation_errors)
+
+
+def dedupe_edges(edge_lists: Iterable[list], summary: dict) -> Iterator[list]:
+    """
+    Drop edges already seen under the same (source, target, type) key.
+
+    Duplicates are counted in summary["duplicate_edges"].
+    """
+    seen: set[tuple] = set()
+    # Tallied locally and written back to summary once the lists are consumed
+    duplicates = 0
+    try:
+        for edges in edge_lists:
+            unique = []
+            for edge in edges:
+                try:
+                    key = (edge["source"], edge["target"], edge["type"])
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                except TypeError:
+                    # Unhashable source/target values are kept as-is
+                    pass
+                unique.append(edge)
+            yield unique
+    finally:
+        summary["duplicate_edges"] += duplicates
+
+
+def write_edges(output_path: Path, edge_lists: Iterable[list], output_format: str = "json") -> None:
+    """
+    Stream edges into a single {"edges": [...]} JSON file, or one edge per
+    line when output_format is "ndjson".
+
+    Each edge is serialized and written as soon as its file is merged, so
+    the full merged list is never held in memory.
+    """
+    with open(output_path, "wb", buffering=1 << 20) as out:
+        # Bound locally: these run once per edge
+        write = out.write
+        dumps = _dumps
+
+        if output_format == "ndjson":
+            for edges in edge_lists:
+                for edge in edges:
+                    write(dumps(edge))
+                    write(b"\n")
+            return
+
+        write(b'{\n  "edges": [')
+        first = True
+        for edges in edge_lists:
+            for edge in edges:
+                write(b"\n    " if first else b",\n    ")
+                write(dumps(edge))
+                first = False
+        write(b"\n  ]\n}\n")
+
+
+def merge_edge_files(
+    input_dir: Path,
+    output_path: Path,
+    validate: bool = False,
+    verbose: bool = False,
+    threads: bool = False,
+    output_format: str = "json",
+    dedupe: bool = False,
+) -> dict:
+    """
+    Merge all edge JSON files in a directory into output_path.
+
+    Returns:
+        summary dict of file counts, edge count, and validation errors
     """
-    merged_edges = []
     summary = {
         "files_processed": 0,
         "files_valid": 0,
         "files_invalid": 0,
         "total_edges": 0,
+        "duplicate_edges": 0,
         "validation_errors": {},
     }
 
-    # Find all JSON files in the input directory
-    json_files = sorted(input_dir.glob("*.json"))
-
-    for file_path in json_files:
-        summary["files_processed"] += 1
-
-        if verbose:
-            print(f"Processing: {file_path.name}", file=sys.stderr)
-
-        data, errors = validate_edge_file(file_path)
-
-        if errors:
-            summary["files_invalid"] += 1
-            if validate:
-                summary["validation_errors"][file_path.name] = errors
-            if verbose:
-                print(f"  -> INVALID ({len(errors)} errors)", file=sys.stderr)
-        else:
-            summary["files_valid"] += 1
-            edges = data.get("edges", [])
-            summary["total_edges"] += len(edges)
-            merged_edges.extend(edges)
-            if verbose:
-                print(f"  -> OK ({len(edges)} edges)", file=sys.stderr)
+    edge_lists = iter_edge_files(
+        input_dir,
+        summary,
+        validate=validate,
+        verbose=verbose,
+        threads=threads,
+    )
+    if dedupe:
+        edge_lists = dedupe_edges(edge_lists, summary)
+    write_edges(output_path, edge_lists, output_format)
 
-    return {"edges": merged_edges}, summary
+    return summary
 
 
 def main():
@@ -142,11 +426,27 @@ def main():
         required=True,
         help="Output path for merged edges.json",
     )
+    parser.add_argument(
+        "--format", "-f",
+        choices=["json", "ndjson"],
+        default="json",
+        help="Output format: a single JSON object (default) or newline-delimited edges",
+    )
     parser.add_argument(
         "--validate",
         action="store_true",
         help="Report validation errors in detail",
     )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Drop duplicate edges (same source, target, and type)",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="Validate files with a thread pool instead of a process pool",
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -163,20 +463,27 @@ def main():
         print(f"Error: Input directory does not exist: {input_dir}", file=sys.stderr)
         sys.exit(1)
 
-    # Merge files
-    merged_data, summary = merge_edge_files(input_dir, validate=args.validate, verbose=args.verbose)
-
     # Create output directory if needed
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write merged output
-    output_path.write_text(json.dumps(merged_data, indent=2))
+    # Merge files, streaming edges into the output
+    summary = merge_edge_files(
+        input_dir,
+        output_path,
+        validate=args.validate,
+        verbose=args.verbose,
+        threads=args.threads,
+        output_format=args.format,
+        dedupe=args.dedupe,
+    )
 
     # Print summary
     print(f"Files processed: {summary['files_processed']}", file=sys.stderr)
     print(f"Files valid: {summary['files_valid']}", file=sys.stderr)
     print(f"Files invalid: {summary['files_invalid']}", file=sys.stderr)
     print(f"Total edges: {summary['total_edges']}", file=sys.stderr)
+    if args.dedupe:
+        print(f"Duplicate edges removed: {summary['duplicate_edges']}", file=sys.stderr)
     print(f"Output written to: {output_path}", file=sys.stderr)
 
     # Print validation errors if requested
@@ -3,13 +3,14 @@
 # requires-python = ">=3.10"
 # dependencies = [
 #     "tiktoken",
+#     "orjson; platform_python_implementation == 'CPython'",
 # ]
 # ///
 """
 tree.py - Generate file tree JSON with token counts for agent docs.
 
 Usage:
-    uv run tree.py <root_path> [--output <tree.json>] [--path-weights <path_weights.json>]
+    uv run tree.py <root_path> [--output <tree.json>] [--path-weights <path_weights.json>] [--pretty]
 
 Outputs a JSON tree structure where agent docs (CLAUDE.md, AGENTS.md) include
 token counts, enabling visualization of instruction file distribution.
@@ -19,21 +20,27 @@ import argparse
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import tiktoken
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Patterns for instruction files (agent docs)
-AGENT_DOC_PATTERNS = {
+AGENT_DOC_PATTERNS = frozenset({
     "CLAUDE.md",
     "AGENTS.md",
     "claude.md",
     "agents.md",
-}
+})
 
 # Directories to skip
-SKIP_DIRS = {
+SKIP_DIRS = frozenset({
     "node_modules",
     ".git",
     "__pycache__",
@@ -52,10 +59,13 @@ SKIP_DIRS = {
     ".vscode",
     ".claude",
     "claude-tree",  # Skip output directory
-}
+})
+
+# Agent docs larger than this are not read; their tokens are estimated as bytes / 4
+MAX_AGENT_DOC_BYTES = 2 * 1024 * 1024
 
 # File extensions to skip (binary/non-text files)
-SKIP_EXTENSIONS = {
+SKIP_EXTENSIONS = frozenset({
     ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg",
     ".woff", ".woff2", ".ttf", ".eot",
     ".pdf", ".zip", ".tar", ".gz", ".rar",
@@ -63,7 +73,7 @@ SKIP_EXTENSIONS = {
     ".pyc", ".pyo", ".class",
     ".db", ".sqlite", ".sqlite3",
     ".lock", ".sum",
-}
+})
 
 
 def get_tokenizer():
@@ -76,6 +86,65 @@ def count_tokens(content: str, tokenizer) -> int:
     return len(tokenizer.encode(content))
 
 
+def count_agent_doc_tokens(pending: list[tuple[dict, Path]], tokenizer) -> None:
+    """
+    Read and tokenize agent docs, storing 'tokens' on each node.
+
+    Docs are read on a thread pool to overlap I/O, then encoded with one
+    encode_batch() call, which tokenizes on tiktoken's own threads. A doc that
+    cannot be read or encoded counts 0 tokens.
+    """
+    def read(doc_path: Path) -> str | None:
+        try:
+            return doc_path.read_text(encoding="utf-8")
+        except Exception as e:
+            print(f"Warning: Could not read {doc_path}: {e}", file=sys.stderr)
+            return None
+
+    for file_node, _ in pending:
+        file_node["tokens"] = 0
+    if not pending:
+        return
+
+    workers = max(1, min(os.cpu_count() or 1, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        contents = list(executor.map(read, [doc_path for _, doc_path in pending]))
+    readable = [(entry, content) for entry, content in zip(pending, contents) if content is not None]
+
+    try:
+        encoded = tokenizer.encode_batch([content for _, content in readable], num_threads=workers)
+        counts = [len(tokens) for tokens in encoded]
+    except Exception:
+        # One doc failing to encode (e.g. a disallowed special token) fails the
+        # whole batch; count them one by one so only that doc falls back to 0
+        counts = []
+        for (_, doc_path), content in readable:
+            try:
+                counts.append(count_tokens(content, tokenizer))
+            except Exception as e:
+                print(f"Warning: Could not tokenize {doc_path}: {e}", file=sys.stderr)
+                counts.append(0)
+
+    for ((file_node, _), _), tokens in zip(readable, counts):
+        file_node["tokens"] = tokens
+
+
+def dumps_json(data, pretty: bool = False) -> bytes:
+    """Serialize data as UTF-8 JSON, compact unless pretty, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(data, indent=2).encode("utf-8")
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def write_json(path: str, data, pretty: bool = False) -> None:
+    """Write data as JSON to path, creating parent directories."""
+    output_path = Path(path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(dumps_json(data, pretty))
+
+
 def is_agent_doc(filename: str) -> bool:
     """Check if a file is an agent documentation file."""
     return filename in AGENT_DOC_PATTERNS
@@ -83,27 +152,42 @@ def is_agent_doc(filename: str) -> bool:
 
 def should_skip_file(filename: str) -> bool:
     """Check if a file should be skipped based on extension."""
-    _, ext = os.path.splitext(filename.lower())
-    return ext in SKIP_EXTENSIONS
+    # Same extension as os.path.splitext(): leading dots (".png") start no extension
+    i = filename.rfind(".")
+    return i > 0 and filename[i:].lower() in SKIP_EXTENSIONS and filename[:i].strip(".") != ""
 
 
-def build_tree(root_path: Path, tokenizer) -> dict:
+def build_tree(root_path: Path, tokenizer) -> tuple[dict, list[dict]]:
     """
     Build a tree structure representing the file system.
 
-    Returns a nested dict with:
+    Returns the tree and a flat list of its agent docs ({path, tokens}, in tree
+    order), collected during the same walk. The tree is a nested dict with:
     - name: filename or directory name
     - path: relative path from root
     - type: "directory" or "file"
     - children: list of child nodes (for directories)
     - isAgentDoc: True if this is a CLAUDE.md/AGENTS.md file
     - tokens: token count (only for agent docs)
+    - tokensEstimated: True if the doc exceeded MAX_AGENT_DOC_BYTES and its
+      tokens were estimated from its size instead of counted
+
+    Agent docs are tokenized after the walk, all at once (see
+    count_agent_doc_tokens).
     """
     root_name = root_path.name or "root"
-
-    def process_directory(dir_path: Path, rel_path: str) -> dict:
-        """Recursively process a directory and its contents."""
-        name = dir_path.name or root_name
+    # Every agent doc node in walk order, and (file_node, path) for those still
+    # to be tokenized after the walk
+    agent_doc_nodes: list[dict] = []
+    pending_docs: list[tuple[dict, Path]] = []
+
+    def process_directory(dir_path: str, rel_path: str, name: str) -> dict:
+        """
+        Recursively process a directory and its contents.
+
+        Paths are plain strings ("/"-joined relative paths); a Path is only
+        built for agent docs, which are read later.
+        """
         node = {
             "name": name,
             "path": rel_path,
@@ -111,16 +195,19 @@ def build_tree(root_path: Path, tokenizer) -> dict:
             "children": [],
         }
 
+        # scandir entries carry the file type from the directory read, so is_dir()
+        # and is_file() usually need no extra stat() call
         try:
-            entries = sorted(os.listdir(dir_path))
+            with os.scandir(dir_path) as it:
+                dir_entries = sorted(it, key=lambda e: e.name)
         except PermissionError:
             return node
 
-        for entry in entries:
-            entry_path = dir_path / entry
-            entry_rel_path = str(Path(rel_path) / entry) if rel_path else entry
+        for dir_entry in dir_entries:
+            entry = dir_entry.name
+            entry_rel_path = entry if rel_path == "." else f"{rel_path}/{entry}"
 
-            if entry_path.is_dir():
+            if dir_entry.is_dir():
                 # Skip excluded directories
                 if entry in SKIP_DIRS:
                     continue
@@ -128,12 +215,12 @@ def build_tree(root_path: Path, tokenizer) -> dict:
                 if entry.startswith(".") and entry != ".claude":
                     continue
 
-                child_node = process_directory(entry_path, entry_rel_path)
+                child_node = process_directory(dir_entry.path, entry_rel_path, entry)
                 # Only include directories that have children or contain agent docs
                 if child_node["children"]:
                     node["children"].append(child_node)
 
-            elif entry_path.is_file():
+            elif dir_entry.is_file():
                 # Skip files we don't want to include
                 if should_skip_file(entry):
                     continue
@@ -144,22 +231,31 @@ def build_tree(root_path: Path, tokenizer) -> dict:
                     "type": "file",
                 }
 
-                # Add token count for agent docs
+                # Queue agent docs for token counting, estimating oversized ones
                 if is_agent_doc(entry):
                     file_node["isAgentDoc"] = True
                     file_node["agentType"] = "claude" if entry.lower() == "claude.md" else "agents"
+                    agent_doc_nodes.append(file_node)
                     try:
-                        content = entry_path.read_text(encoding="utf-8")
-                        file_node["tokens"] = count_tokens(content, tokenizer)
-                    except Exception as e:
-                        print(f"Warning: Could not read {entry_path}: {e}", file=sys.stderr)
-                        file_node["tokens"] = 0
+                        size = dir_entry.stat().st_size
+                    except OSError:
+                        size = 0  # Reported when the read fails
+                    if size > MAX_AGENT_DOC_BYTES:
+                        file_node["tokens"] = size // 4
+                        file_node["tokensEstimated"] = True
+                        print(f"Warning: {dir_entry.path} is {size} bytes; estimating "
+                              f"{file_node['tokens']} tokens without reading it", file=sys.stderr)
+                    else:
+                        pending_docs.append((file_node, Path(dir_entry.path)))
 
                 node["children"].append(file_node)
 
         return node
 
-    return process_directory(root_path, ".")
+    tree = process_directory(str(root_path), ".", root_name)
+    count_agent_doc_tokens(pending_docs, tokenizer)
+    agent_docs = [{"path": doc["path"], "tokens": doc["tokens"]} for doc in agent_doc_nodes]
+    return tree, agent_docs
 
 
 def filter_tree_to_agent_docs(tree: dict) -> dict:
@@ -168,60 +264,32 @@ def filter_tree_to_agent_docs(tree: dict) -> dict:
     - Directories that contain agent docs (directly or in descendants)
     - Agent doc files
     - Regular files (for reference edges)
-    """
-    def has_agent_doc(node: dict) -> bool:
-        """Check if a node or its descendants contain an agent doc."""
-        if node.get("isAgentDoc"):
-            return True
-        if node["type"] == "directory":
-            return any(has_agent_doc(child) for child in node.get("children", []))
-        return False
-
-    def filter_node(node: dict, include_all_files: bool = False) -> dict | None:
-        """Filter a node and its children."""
-        if node["type"] == "file":
-            # Always include agent docs
-            if node.get("isAgentDoc"):
-                return node
-            # Include regular files only if requested
-            if include_all_files:
-                return node
-            return None
 
-        # Directory node
+    Regular files are kept only in directories whose subtree has an agent doc.
+    A single bottom-up pass decides that, so no subtree is searched twice.
+    """
+    def filter_directory(node: dict) -> dict | None:
+        """Filter a directory, or return None if its subtree has no agent doc."""
         filtered_children = []
+        has_agent_doc = False
         for child in node.get("children", []):
-            # Include all files in directories that have agent docs
-            should_include_all = has_agent_doc(node)
-            filtered_child = filter_node(child, include_all_files=should_include_all)
-            if filtered_child is not None:
-                filtered_children.append(filtered_child)
-
-        if filtered_children or has_agent_doc(node):
-            return {
-                **node,
-                "children": filtered_children,
-            }
-        return None
-
-    return filter_node(tree) or tree
-
-
-def collect_agent_docs(tree: dict) -> list[dict]:
-    """Extract a flat list of all agent docs from the tree."""
-    agent_docs = []
-
-    def walk(node: dict):
-        if node.get("isAgentDoc"):
-            agent_docs.append({
-                "path": node["path"],
-                "tokens": node.get("tokens", 0),
-            })
-        for child in node.get("children", []):
-            walk(child)
+            if child["type"] == "file":
+                has_agent_doc = has_agent_doc or bool(child.get("isAgentDoc"))
+                filtered_children.append(child)
+            else:
+                filtered_child = filter_directory(child)
+                if filtered_child is not None:
+                    has_agent_doc = True
+                    filtered_children.append(filtered_child)
+
+        if not has_agent_doc:
+            return None
+        return {
+            **node,
+            "children": filtered_children,
+        }
 
-    walk(tree)
-    return agent_docs
+    return filter_directory(tree) or tree
 
 
 def collect_directories(tree: dict) -> list[str]:
@@ -281,6 +349,30 @@ def get_cumulative_tokens(path: str, agent_doc_tokens: dict[str, int]) -> dict:
     return {"cumulativeTokens": total, "breakdown": breakdown}
 
 
+def annotate_cumulative_tokens(tree: dict) -> None:
+    """
+    Store the cumulative agent doc tokens on every directory node in one DFS.
+
+    Each directory gets a 'cumulativeTokens' field with the same total
+    get_cumulative_tokens() returns for its path: the parent's total plus the
+    directory's own CLAUDE.md/AGENTS.md. The visualization reads it directly
+    instead of walking the path on every re-render.
+    """
+    def walk(node: dict, inherited: int):
+        children = node.get("children", [])
+        total = inherited + sum(
+            child.get("tokens", 0)
+            for child in children
+            if child["type"] == "file" and child["name"] in ("CLAUDE.md", "AGENTS.md")
+        )
+        node["cumulativeTokens"] = total
+        for child in children:
+            if child["type"] == "directory":
+                walk(child, total)
+
+    walk(tree, 0)
+
+
 def compute_path_weights(tree: dict, agent_docs: list[dict], root_path: str) -> dict:
     """
     Compute cumulative token weights for all directory paths.
@@ -356,6 +448,11 @@ def main():
         type=str,
         help="Output path weights JSON file (optional)",
     )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the JSON output (default: compact)",
+    )
 
     args = parser.parse_args()
     root_path = Path(args.root_path).resolve()
@@ -371,15 +468,16 @@ def main():
     # Initialize tokenizer
     tokenizer = get_tokenizer()
 
-    # Build full tree
-    tree = build_tree(root_path, tokenizer)
+    # Build full tree, collecting agent docs for the summary on the way (filtering
+    # never drops an agent doc, so the list holds for the filtered tree too)
+    tree, agent_docs = build_tree(root_path, tokenizer)
 
     # Optionally filter to just agent docs and their context
     if not args.full_tree:
         tree = filter_tree_to_agent_docs(tree)
 
-    # Collect agent docs for summary
-    agent_docs = collect_agent_docs(tree)
+    # Precompute cumulative tokens for the visualization
+    annotate_cumulative_tokens(tree)
 
     # Build output with metadata
     output = {
@@ -406,23 +504,17 @@ def main():
             print(f"  {f['path']}: {f['tokens']} tokens", file=sys.stderr)
 
     # Output
-    json_output = json.dumps(output, indent=2)
-
     if args.output:
-        output_path = Path(args.output)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(json_output)
+        write_json(args.output, output, args.pretty)
         print(f"\nTree written to {args.output}", file=sys.stderr)
     else:
-        print(json_output)
+        sys.stdout.flush()
+        sys.stdout.buffer.write(dumps_json(output, args.pretty) + b"\n")
 
     # Generate path weights if requested
     if args.path_weights:
         path_weights = compute_path_weights(tree, agent_docs, str(root_path))
-        path_weights_output = json.dumps(path_weights, indent=2)
-        weights_path = Path(args.path_weights)
-        weights_path.parent.mkdir(parents=True, exist_ok=True)
-        weights_path.write_text(path_weights_output)
+        write_json(args.path_weights, path_weights, args.pretty)
         print(f"Path weights written to {args.path_weights}", file=sys.stderr)
         print(f"  Max path weight: {path_weights['metadata']['maxPathWeight']} tokens", file=sys.stderr)
         print(f"  Paths with tokens: {len(path_weights['ranking'])}", file=sys.stderr)
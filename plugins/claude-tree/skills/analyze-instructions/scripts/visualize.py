@@ -1,13 +1,15 @@
 #!/usr/bin/env -S uv run --quiet
 # /// script
 # requires-python = ">=3.10"
-# dependencies = []
+# dependencies = [
+#     "orjson; platform_python_implementation == 'CPython'",
+# ]
 # ///
 """
 visualize.py - Generate interactive D3.js HTML visualization.
 
 Usage:
-    uv run visualize.py --tree <tree.json> --edges <edges.json> [--path-weights <path_weights.json>] [--output <dir>] [--open]
+    uv run visualize.py --tree <tree.json> --edges <edges.json|edges.ndjson> [--path-weights <path_weights.json>] [--output <dir>] [--open] [--no-compress]
 
 Features:
 - Collapsible tree view
@@ -18,25 +20,134 @@ Features:
 """
 
 import argparse
+import base64
+import gzip
+import io
 import json
 import os
 import sys
 import webbrowser
 from pathlib import Path
+from typing import TextIO
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def load_json(path: str) -> dict:
-    """Load JSON from file."""
-    return json.loads(Path(path).read_text())
+# Embedded payloads at least this long are gzip-compressed into the page
+COMPRESS_MIN_BYTES = 64 * 1024
 
 
-def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | None = None) -> str:
-    """Generate self-contained HTML with embedded D3.js visualization."""
-    tree_json = json.dumps(tree_data)
-    edges_json = json.dumps(edges_data)
-    path_weights_json = json.dumps(path_weights_data) if path_weights_data else "null"
-
-    return f'''<!DOCTYPE html>
+def load_json(path: str) -> dict:
+    """Load JSON from file."""
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def load_edges(path: str) -> dict:
+    """Load edges from a merged edges.json, or from NDJSON (.ndjson/.jsonl) with one edge per line."""
+    if Path(path).suffix in (".ndjson", ".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            return {"edges": [json.loads(line) for line in f if line.strip()]}
+    return load_json(path)
+
+
+def to_script_json(data) -> str:
+    """Serialize data for embedding in an inline <script> block."""
+    text = orjson.dumps(data).decode("utf-8") if orjson is not None else json.dumps(data)
+    # Keep a "</script>" inside string values from closing the script element
+    return text.replace("</", "<\\/")
+
+
+def to_script_payload(data, compress: bool = True) -> str:
+    """Serialize data as an inline <script> expression, gzip+base64 encoded when large."""
+    text = to_script_json(data)
+    if not compress or len(text) < COMPRESS_MIN_BYTES:
+        return text
+    blob = base64.b64encode(gzip.compress(text.encode("utf-8"), mtime=0)).decode("ascii")
+    # decodePayload() is defined in the page script and resolves to the parsed JSON
+    return f'decodePayload("{blob}")'
+
+
+def assign_node_ids(tree_data: dict, edges_data: dict) -> tuple[dict, dict]:
+    """
+    Number tree nodes in preorder and resolve edge endpoints to those ids.
+
+    Returns copies of tree_data and edges_data in which each node has an integer
+    'id', and each edge whose endpoints are in the tree has 'sourceId'/'targetId',
+    so the page indexes nodes in arrays instead of path-keyed maps. The inputs
+    are left unchanged.
+    """
+    path_to_id = {}
+
+    def walk(node: dict) -> dict:
+        node = {**node, "id": len(path_to_id)}
+        path_to_id[node.get("path") or "."] = node["id"]
+        if "children" in node:
+            node["children"] = [walk(child) for child in node["children"]]
+        return node
+
+    tree_data = dict(tree_data)
+    if tree_data.get("tree"):
+        tree_data["tree"] = walk(tree_data["tree"])
+
+    edges_data = dict(edges_data)
+    if "edges" in edges_data:
+        edges = []
+        for edge in edges_data["edges"]:
+            edge = dict(edge)
+            if edge.get("source") in path_to_id:
+                edge["sourceId"] = path_to_id[edge["source"]]
+            if edge.get("target") in path_to_id:
+                edge["targetId"] = path_to_id[edge["target"]]
+            edges.append(edge)
+        edges_data["edges"] = edges
+
+    return tree_data, edges_data
+
+
+def drop_derivable_paths(tree_data: dict, edges_data: dict) -> tuple[dict, dict]:
+    """
+    Drop path strings the page can rebuild from the tree, to shrink the payload.
+
+    Takes the output of assign_node_ids() and returns copies of both. A node's
+    'path' is dropped when it is its parent's path joined with its name ('.' for
+    the root), and an edge's 'source'/'target' when it resolved to a node id.
+    The page restores both while indexing.
+    """
+    def walk(node: dict, expected: str) -> dict:
+        path = node.get("path")
+        node = dict(node)
+        if path == expected:
+            del node["path"]
+        base = expected if path is None else path
+        if "children" in node:
+            prefix = "" if base in (".", "") else f"{base}/"
+            node["children"] = [walk(child, prefix + child.get("name", "")) for child in node["children"]]
+        return node
+
+    tree_data = dict(tree_data)
+    if tree_data.get("tree"):
+        tree_data["tree"] = walk(tree_data["tree"], ".")
+
+    edges_data = dict(edges_data)
+    if "edges" in edges_data:
+        edges = []
+        for edge in edges_data["edges"]:
+            edge = dict(edge)
+            if "sourceId" in edge:
+                del edge["source"]
+            if "targetId" in edge:
+                del edge["target"]
+            edges.append(edge)
+        edges_data["edges"] = edges
+
+    return tree_data, edges_data
+
+
+# Static page template, split at the three injected JSON payloads so the page
+# can be streamed to disk without building it as one string
+HTML_PROLOGUE = r'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -44,7 +155,7 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
     <title>Claude Tree - Instruction File Visualization</title>
     <script src="https://d3js.org/d3.v7.min.js"></script>
     <style>
-        :root {{
+        :root {
             --bg-primary: #0d1117;
             --bg-secondary: #161b22;
             --bg-tertiary: #21262d;
@@ -59,30 +170,30 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             --edge-agent-doc: #58a6ff;
             --edge-file: #d4a72c;  /* warm gold, distinct from orange node highlights */
             --edge-directory: #a371f7;
-        }}
+        }
 
-        * {{
+        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
 
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
             background: var(--bg-primary);
             color: var(--text-primary);
             line-height: 1.5;
             overflow: hidden;
-        }}
+        }
 
-        .container {{
+        .container {
             display: grid;
             grid-template-columns: 1fr 320px;
             grid-template-rows: auto 1fr;
             height: 100vh;
-        }}
+        }
 
-        header {{
+        header {
             grid-column: 1 / -1;
             background: var(--bg-secondary);
             padding: 12px 20px;
@@ -90,102 +201,112 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             align-items: center;
             justify-content: space-between;
             border-bottom: 1px solid var(--border);
-        }}
+        }
 
-        header h1 {{
+        header h1 {
             font-size: 16px;
             font-weight: 600;
             display: flex;
             align-items: center;
             gap: 8px;
             color: var(--text-primary);
-        }}
+        }
 
-        .header-stats {{
+        .header-stats {
             display: flex;
             gap: 20px;
             font-size: 13px;
-        }}
+        }
 
-        .header-stat {{
+        .header-stat {
             display: flex;
             align-items: center;
             gap: 6px;
-        }}
+        }
 
-        .header-stat-value {{
+        .header-stat-value {
             font-weight: 600;
             color: var(--accent);
-        }}
+        }
 
-        .header-stat-label {{
+        .header-stat-label {
             color: var(--text-secondary);
-        }}
+        }
 
-        .main-content {{
+        .main-content {
             background: var(--bg-primary);
             overflow: hidden;
             position: relative;
-        }}
+        }
 
-        .tree-container {{
+        .tree-container {
             width: 100%;
             height: 100%;
             overflow: hidden;
             cursor: grab;
             position: relative;
-        }}
+        }
 
-        #tree {{
+        #tree {
             width: 100%;
             height: 100%;
             display: block;
-        }}
+            position: relative;
+        }
+
+        #tree-canvas {
+            position: absolute;
+            top: 0;
+            left: 0;
+            width: 100%;
+            height: 100%;
+            pointer-events: none;
+        }
 
-        .tree-container:active {{
+        .tree-container:active {
             cursor: grabbing;
-        }}
+        }
 
-        .sidebar {{
+        .sidebar {
             background: var(--bg-secondary);
             border-left: 1px solid var(--border);
             overflow-y: auto;
             padding: 16px;
-        }}
+        }
 
-        .sidebar h2 {{
+        .sidebar h2 {
             font-size: 11px;
             font-weight: 600;
             color: var(--text-muted);
             text-transform: uppercase;
             letter-spacing: 0.5px;
             margin-bottom: 12px;
-        }}
+        }
 
-        .sidebar-section {{
+        .sidebar-section {
             margin-bottom: 24px;
-        }}
+        }
 
-        .legend-item {{
+        .legend-item {
             display: flex;
             align-items: center;
             gap: 8px;
             margin-bottom: 8px;
             font-size: 12px;
-        }}
+        }
 
-        .legend-dot {{
+        .legend-dot {
             width: 12px;
             height: 12px;
             border-radius: 50%;
-        }}
+        }
 
-        .legend-line {{
+        .legend-line {
             width: 24px;
             height: 2px;
-        }}
+        }
 
-        .legend-line.dashed {{
+        .legend-line.dashed {
             background: repeating-linear-gradient(
                 90deg,
                 var(--text-secondary) 0px,
@@ -193,21 +314,21 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
                 transparent 4px,
                 transparent 8px
             );
-        }}
+        }
 
-        .path-info {{
+        .path-info {
             background: var(--bg-tertiary);
             border-radius: 6px;
             padding: 12px;
-        }}
+        }
 
-        .path-info-title {{
+        .path-info-title {
             font-size: 11px;
             color: var(--text-muted);
             margin-bottom: 4px;
-        }}
+        }
 
-        .path-info-path {{
+        .path-info-path {
             font-size: 12px;
             font-family: monospace;
             color: var(--accent);
@@ -215,163 +336,192 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             margin-bottom: 8px;
             overflow-wrap: break-word;
             overflow: hidden;
-        }}
+        }
 
-        .path-info-tokens {{
+        .path-info-tokens {
             font-size: 20px;
             font-weight: 600;
-        }}
+        }
 
-        .path-info-label {{
+        .path-info-label {
             font-size: 11px;
             color: var(--text-secondary);
-        }}
+        }
 
-        .path-chain {{
+        .path-chain {
             margin-top: 12px;
             padding-top: 12px;
             border-top: 1px solid var(--border);
-        }}
+        }
 
-        .path-chain-item {{
+        .path-chain-item {
             display: flex;
             justify-content: space-between;
             align-items: center;
             padding: 4px 0;
             font-size: 11px;
-        }}
+        }
 
-        .path-chain-item .file {{
+        .path-chain-item .file {
             color: var(--text-secondary);
             font-family: monospace;
             overflow: hidden;
             text-overflow: ellipsis;
             min-width: 0;
-        }}
+        }
 
-        .path-chain-item .tokens {{
+        .path-chain-item .tokens {
             font-weight: 500;
-        }}
+        }
 
         /* Tree nodes */
-        .node {{
+        .node {
             cursor: pointer;
-        }}
+        }
 
-        .node circle {{
+        .node .dot {
             stroke: var(--bg-primary);
             stroke-width: 2px;
             transition: all 0.15s ease;
-        }}
+        }
 
-        .node:hover circle {{
+        .node:hover .dot {
             stroke-width: 3px;
-            filter: brightness(1.2);
-        }}
+        }
 
-        .node text {{
+        /* Glow behind highlighted nodes: a wider translucent circle whose opacity is
+           toggled and animated, which is far cheaper to paint than a drop-shadow filter */
+        .node .glow {
+            fill: var(--accent);
+            opacity: 0;
+            pointer-events: none;
+            transition: opacity 0.15s ease;
+        }
+
+        .node text {
             font-size: 11px;
             fill: var(--text-primary);
             pointer-events: none;
-        }}
+        }
 
-        .node.directory circle {{
+        .node.directory .dot {
             fill: var(--bg-tertiary);
-        }}
+        }
 
-        .node.directory text {{
+        .node.directory text {
             fill: #7d8fa8;  /* muted blue-gray to pair with blue walk highlighting */
-        }}
+        }
 
-        .node.file circle {{
+        .node.file .dot {
             fill: var(--text-muted);
-        }}
+        }
 
-        .node.agent-doc circle {{
+        .node.agent-doc .dot {
             stroke-width: 2px;
-        }}
+        }
 
-        .node.collapsed circle {{
+        .node.collapsed .dot {
             stroke: var(--accent);
             stroke-width: 2px;
-        }}
+        }
 
-        .node.highlighted circle {{
+        .node.highlighted .dot {
             stroke: var(--accent);
             stroke-width: 3px;
-            filter: drop-shadow(0 0 4px var(--accent));
-        }}
+        }
+
+        .node.highlighted .glow {
+            opacity: 0.35;
+        }
 
-        @keyframes pulse {{
-            0%, 100% {{ filter: drop-shadow(0 0 4px var(--accent)); }}
-            50% {{ filter: drop-shadow(0 0 8px var(--accent)); }}
-        }}
+        @keyframes pulse {
+            0%, 100% { opacity: 0.35; }
+            50% { opacity: 0.6; }
+        }
 
-        .node.highlighted.selected circle {{
+        .node.highlighted.selected .glow {
             animation: pulse 2s ease-in-out infinite;
-        }}
+        }
 
-        .node.highlighted text {{
+        .node.highlighted text {
             fill: var(--accent);
             font-weight: 600;
-        }}
+        }
 
-        .node.referenced circle {{
+        .node.referenced .dot {
             stroke: #f0883e;
             stroke-width: 3px;
-            filter: drop-shadow(0 0 4px #f0883e);
-        }}
+        }
+
+        .node.referenced .glow {
+            fill: #f0883e;
+            opacity: 0.35;
+        }
 
-        .node.referenced text {{
+        .node.referenced text {
             fill: #f0883e;
             font-weight: 600;
-        }}
+        }
 
-        .edge.highlighted-edge {{
+        .edge.highlighted-edge {
             opacity: 1;
             stroke-width: 2.5px;
-        }}
+        }
+
+        /* Off-screen or sub-pixel tree elements (viewport culling) */
+        .node.culled,
+        .link.culled {
+            display: none;
+        }
+
+        /* Zoomed-out overview: the canvas paints the tree, the SVG keeps highlighted elements */
+        #tree.overview .node:not(.highlighted):not(.referenced),
+        #tree.overview .link:not(.highlighted),
+        #tree.overview .edge:not(.highlighted-edge):not(.hover-edge) {
+            display: none;
+        }
 
         /* Tree links */
-        .link {{
+        .link {
             fill: none;
             stroke: var(--border);
             stroke-width: 1px;
-        }}
+        }
 
-        .link.highlighted {{
+        .link.highlighted {
             stroke: var(--accent);
             stroke-width: 2px;
-        }}
+        }
 
         /* Reference edges */
-        .edge {{
+        .edge {
             fill: none;
             stroke-width: 1.5px;
             opacity: 0.6;
-        }}
+            pointer-events: none;  /* hover is hit-tested by the svg through a quadtree */
+        }
 
-        .edge.agent-doc {{
+        .edge.agent-doc {
             stroke: var(--edge-agent-doc);
-        }}
+        }
 
-        .edge.file {{
+        .edge.file {
             stroke: var(--edge-file);
             stroke-dasharray: 4,3;
-        }}
+        }
 
-        .edge.directory {{
+        .edge.directory {
             stroke: var(--edge-directory);
             stroke-dasharray: 2,2;
-        }}
+        }
 
-        .edge:hover {{
+        .edge.hover-edge {
             opacity: 1;
             stroke-width: 2.5px;
-        }}
+        }
 
         /* Tooltip */
-        .tooltip {{
+        .tooltip {
             position: fixed;
             background: var(--bg-secondary);
             border: 1px solid var(--border);
@@ -382,42 +532,42 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             max-width: 280px;
             font-size: 12px;
             box-shadow: 0 4px 12px rgba(0,0,0,0.4);
-        }}
+        }
 
-        .tooltip-title {{
+        .tooltip-title {
             font-weight: 600;
             color: var(--accent);
             margin-bottom: 6px;
             word-break: break-all;
-        }}
+        }
 
-        .tooltip-row {{
+        .tooltip-row {
             display: flex;
             justify-content: space-between;
             padding: 2px 0;
             gap: 12px;
-        }}
+        }
 
-        .tooltip-label {{
+        .tooltip-label {
             color: var(--text-secondary);
             flex-shrink: 0;
-        }}
+        }
 
-        .tooltip-value {{
+        .tooltip-value {
             font-weight: 500;
-        }}
+        }
 
         /* Controls */
-        .controls {{
+        .controls {
             position: absolute;
             top: 12px;
             left: 12px;
             display: flex;
             gap: 8px;
             z-index: 100;
-        }}
+        }
 
-        .control-btn {{
+        .control-btn {
             background: var(--bg-secondary);
             border: 1px solid var(--border);
             border-radius: 4px;
@@ -426,14 +576,14 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             color: var(--text-primary);
             cursor: pointer;
             transition: all 0.15s ease;
-        }}
+        }
 
-        .control-btn:hover {{
+        .control-btn:hover {
             background: var(--bg-tertiary);
             border-color: var(--accent);
-        }}
+        }
 
-        .depth-status {{
+        .depth-status {
             background: var(--bg-secondary);
             border: 1px solid var(--border);
             border-radius: 4px;
@@ -443,14 +593,14 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
+        }
 
-        .depth-status .current {{
+        .depth-status .current {
             color: var(--accent);
             font-weight: 600;
-        }}
+        }
 
-        .selected-status {{
+        .selected-status {
             background: var(--bg-secondary);
             border: 1px solid var(--border);
             border-radius: 4px;
@@ -460,36 +610,36 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
+        }
 
-        .selected-status .selected-name {{
+        .selected-status .selected-name {
             color: var(--green);
             font-weight: 500;
             max-width: 150px;
             overflow: hidden;
             text-overflow: ellipsis;
             white-space: nowrap;
-        }}
+        }
 
-        .selected-status .none {{
+        .selected-status .none {
             color: var(--text-muted);
-        }}
+        }
 
-        .instructions {{
+        .instructions {
             font-size: 11px;
             color: var(--text-muted);
             padding: 8px;
             background: var(--bg-tertiary);
             border-radius: 4px;
             margin-bottom: 16px;
-        }}
+        }
 
-        .agent-docs-ranking {{
+        .agent-docs-ranking {
             max-height: 200px;
             overflow-y: auto;
-        }}
+        }
 
-        .ranking-item {{
+        .ranking-item {
             display: flex;
             justify-content: space-between;
             align-items: center;
@@ -498,28 +648,28 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             cursor: pointer;
             border-radius: 4px;
             transition: background 0.15s ease;
-        }}
+        }
 
-        .ranking-item:hover {{
+        .ranking-item:hover {
             background: var(--bg-tertiary);
-        }}
+        }
 
-        .ranking-item .path {{
+        .ranking-item .path {
             color: var(--text-secondary);
             font-family: monospace;
             overflow: hidden;
             text-overflow: ellipsis;
             white-space: nowrap;
             max-width: 180px;
-        }}
+        }
 
-        .ranking-item .tokens {{
+        .ranking-item .tokens {
             font-weight: 600;
             flex-shrink: 0;
             margin-left: 8px;
-        }}
+        }
 
-        .copy-btn {{
+        .copy-btn {
             background: #3b82f6;
             color: white;
             border: none;
@@ -528,21 +678,21 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             cursor: pointer;
             font-size: 11px;
             margin-left: 8px;
-        }}
+        }
 
-        .copy-btn:hover {{
+        .copy-btn:hover {
             background: #2563eb;
-        }}
+        }
 
-        .copy-btn:active {{
+        .copy-btn:active {
             background: #1d4ed8;
-        }}
+        }
 
-        .copy-btn.copied {{
+        .copy-btn.copied {
             background: #10b981;
-        }}
+        }
 
-        .toast {{
+        .toast {
             position: fixed;
             bottom: 20px;
             left: 50%;
@@ -554,22 +704,22 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             z-index: 1000;
             opacity: 0;
             transition: opacity 0.3s;
-        }}
+        }
 
-        .toast.show {{
+        .toast.show {
             opacity: 1;
-        }}
+        }
 
         /* View mode toggle */
-        .view-toggle {{
+        .view-toggle {
             display: flex;
             gap: 0;
             border: 1px solid var(--border);
             border-radius: 4px;
             overflow: hidden;
-        }}
+        }
 
-        .view-toggle-btn {{
+        .view-toggle-btn {
             background: var(--bg-secondary);
             border: none;
             padding: 6px 12px;
@@ -577,32 +727,32 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             color: var(--text-secondary);
             cursor: pointer;
             transition: all 0.15s ease;
-        }}
+        }
 
-        .view-toggle-btn:not(:last-child) {{
+        .view-toggle-btn:not(:last-child) {
             border-right: 1px solid var(--border);
-        }}
+        }
 
-        .view-toggle-btn:hover {{
+        .view-toggle-btn:hover {
             background: var(--bg-tertiary);
-        }}
+        }
 
-        .view-toggle-btn.active {{
+        .view-toggle-btn.active {
             background: var(--accent);
             color: var(--bg-primary);
-        }}
+        }
 
         /* Doc type toggle */
-        .doc-type-toggle {{
+        .doc-type-toggle {
             display: flex;
             gap: 0;
             border: 1px solid var(--border);
             border-radius: 4px;
             overflow: hidden;
             margin-left: 8px;
-        }}
+        }
 
-        .doc-type-btn {{
+        .doc-type-btn {
             background: var(--bg-secondary);
             border: none;
             padding: 6px 10px;
@@ -610,47 +760,47 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             color: var(--text-secondary);
             cursor: pointer;
             transition: all 0.15s ease;
-        }}
+        }
 
-        .doc-type-btn:not(:last-child) {{
+        .doc-type-btn:not(:last-child) {
             border-right: 1px solid var(--border);
-        }}
+        }
 
-        .doc-type-btn:hover {{
+        .doc-type-btn:hover {
             background: var(--bg-tertiary);
-        }}
+        }
 
-        .doc-type-btn.active {{
+        .doc-type-btn.active {
             background: var(--accent);
             color: var(--bg-primary);
-        }}
+        }
 
         /* Path weight mode link styles */
-        .link.path-weight-green {{
+        .link.path-weight-green {
             stroke: var(--green);
-        }}
+        }
 
-        .link.path-weight-yellow {{
+        .link.path-weight-yellow {
             stroke: var(--yellow);
-        }}
+        }
 
-        .link.path-weight-red {{
+        .link.path-weight-red {
             stroke: var(--red);
-        }}
+        }
 
-        /* Dimmed edges in path weight mode */
-        .edge.dimmed {{
+        /* Dimmed edges in path weight mode (view state is a class on the root svg) */
+        #tree.view-path .edge {
             opacity: 0.1;
             pointer-events: none;
-        }}
+        }
 
         /* Heaviest paths list */
-        .heaviest-paths-list {{
+        .heaviest-paths-list {
             max-height: 250px;
             overflow-y: auto;
-        }}
+        }
 
-        .heaviest-path-item {{
+        .heaviest-path-item {
             display: flex;
             justify-content: space-between;
             align-items: center;
@@ -659,20 +809,20 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             cursor: pointer;
             border-radius: 4px;
             transition: background 0.15s ease;
-        }}
+        }
 
-        .heaviest-path-item:hover {{
+        .heaviest-path-item:hover {
             background: var(--bg-tertiary);
-        }}
+        }
 
-        .heaviest-path-item .rank {{
+        .heaviest-path-item .rank {
             color: var(--text-muted);
             font-weight: 500;
             margin-right: 8px;
             min-width: 18px;
-        }}
+        }
 
-        .heaviest-path-item .path {{
+        .heaviest-path-item .path {
             color: var(--text-secondary);
             font-family: monospace;
             overflow: hidden;
@@ -680,27 +830,27 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             white-space: nowrap;
             flex: 1;
             min-width: 0;
-        }}
+        }
 
-        .heaviest-path-item .tokens {{
+        .heaviest-path-item .tokens {
             font-weight: 600;
             flex-shrink: 0;
             margin-left: 8px;
-        }}
+        }
 
         /* Section headers with copy buttons */
-        .section-header {{
+        .section-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 12px;
-        }}
+        }
 
-        .section-header h2 {{
+        .section-header h2 {
             margin-bottom: 0;
-        }}
+        }
 
-        .section-copy-btn {{
+        .section-copy-btn {
             background: var(--accent);
             border: none;
             padding: 4px 10px;
@@ -709,53 +859,53 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             font-size: 12px;
             color: var(--bg-primary);
             transition: all 0.15s ease;
-        }}
+        }
 
-        .section-copy-btn:hover {{
+        .section-copy-btn:hover {
             filter: brightness(1.2);
-        }}
+        }
 
-        .section-copy-btn.copied {{
+        .section-copy-btn.copied {
             background: var(--green);
-        }}
+        }
 
         /* Token threshold settings */
-        .token-settings {{
+        .token-settings {
             margin-top: 16px;
             padding-top: 12px;
             border-top: 1px solid var(--border);
-        }}
+        }
 
-        .token-settings-title {{
+        .token-settings-title {
             font-size: 10px;
             font-weight: 600;
             color: var(--text-muted);
             text-transform: uppercase;
             letter-spacing: 0.5px;
             margin-bottom: 8px;
-        }}
+        }
 
-        .threshold-row {{
+        .threshold-row {
             display: flex;
             align-items: center;
             gap: 8px;
             margin-bottom: 6px;
             font-size: 11px;
-        }}
+        }
 
-        .threshold-dot {{
+        .threshold-dot {
             width: 10px;
             height: 10px;
             border-radius: 50%;
             flex-shrink: 0;
-        }}
+        }
 
-        .threshold-label {{
+        .threshold-label {
             color: var(--text-secondary);
             min-width: 50px;
-        }}
+        }
 
-        .threshold-input {{
+        .threshold-input {
             width: 70px;
             background: var(--bg-tertiary);
             border: 1px solid var(--border);
@@ -764,17 +914,17 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             font-size: 11px;
             color: var(--text-primary);
             text-align: right;
-        }}
+        }
 
-        .threshold-input:focus {{
+        .threshold-input:focus {
             outline: none;
             border-color: var(--accent);
-        }}
+        }
 
-        .threshold-suffix {{
+        .threshold-suffix {
             color: var(--text-muted);
             font-size: 10px;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -808,6 +958,7 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
                 <span class="selected-status" id="selected-status">Selected: None</span>
             </div>
             <div class="tree-container">
+                <canvas id="tree-canvas"></canvas>
                 <svg id="tree">
                     <defs>
                         <marker id="arrow-agent-doc" viewBox="0 0 10 10" refX="10" refY="5"
@@ -946,141 +1097,344 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
     <div id="toast" class="toast"></div>
 
     <script>
-        // Injected data
-        const TREE_DATA = {tree_json};
-        const EDGES_DATA = {edges_json};
-        const PATH_WEIGHTS_DATA = {path_weights_json};
-
-        // Build lookup maps
-        const nodeByPath = new Map();
+        // Injected data: plain JSON, or decodePayload("<base64 gzip>") for large payloads
+        const TREE_PAYLOAD = '''
+
+HTML_TREE_TO_EDGES = r''';
+        const EDGES_PAYLOAD = '''
+
+HTML_EDGES_TO_WEIGHTS = r''';
+        const PATH_WEIGHTS_PAYLOAD = '''
+
+HTML_EPILOGUE = r''';
+
+        // Decoded payloads, assigned once at startup (see the end of this script)
+        let TREE_DATA, EDGES_DATA, PATH_WEIGHTS_DATA;
+
+        // Inflate a payload embedded as base64-encoded gzip JSON
+        async function decodePayload(base64) {
+            const binary = atob(base64);
+            const bytes = new Uint8Array(binary.length);
+            for (let i = 0; i < binary.length; i++) {
+                bytes[i] = binary.charCodeAt(i);
+            }
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return JSON.parse(await new Response(stream).text());
+        }
+
+        // Build lookup tables. Nodes are indexed by the integer id visualize.py assigns
+        // in preorder, and only agent docs get a path entry (for getNode()). Paths
+        // visualize.py left out of the payload (drop_derivable_paths) are restored here first.
+        const nodeById = [];
+        const pathToId = new Map();
         const agentDocTokens = new Map();
+        // Reference edges grouped by source path, in EDGES_DATA order
+        const edgesBySource = new Map();
 
-        function indexTree(node, parentPath = '') {{
+        function indexTree(node, parentPath = '') {
+            if (node.path === undefined) {
+                node.path = parentPath === '' ? '.' : parentPath === '.' ? node.name : parentPath + '/' + node.name;
+            }
             const path = node.path || '.';
-            nodeByPath.set(path, node);
-            if (node.isAgentDoc) {{
+            nodeById[node.id] = node;
+            if (node.isAgentDoc) {
+                pathToId.set(path, node.id);
+                node.docIndex = agentDocTokens.size;
                 agentDocTokens.set(path, node.tokens || 0);
-            }}
-            if (node.children) {{
+            }
+            if (node.children) {
                 node.children.forEach(child => indexTree(child, path));
-            }}
-        }}
-
-        if (TREE_DATA.tree) {{
-            indexTree(TREE_DATA.tree);
-        }}
+            }
+        }
+
+        // Look up an agent doc's tree data node by path
+        function getNode(path) {
+            const id = pathToId.get(path);
+            return id !== undefined ? nodeById[id] : null;
+        }
+
+        // Agent docs as [path, tokens, docIndex], most tokens first. agentDocTokens is
+        // only filled at load, so the order is computed once and shared by the ranking
+        // and the copy reports (callers must not modify it).
+        let sortedAgentDocsCache = null;
+
+        function getSortedAgentDocs() {
+            if (!sortedAgentDocsCache) {
+                sortedAgentDocsCache = Array.from(agentDocTokens.entries(), ([path, tokens], docIndex) => [path, tokens, docIndex])
+                    .sort((a, b) => b[1] - a[1]);
+            }
+            return sortedAgentDocsCache;
+        }
+
+        // The sorted agent docs passing the doc type filter, derived once per filter value
+        function getFilteredAgentDocs() {
+            if (activeDocTypeFilter === 'all') return getSortedAgentDocs();
+            return cachedForFilter('sortedAgentDocs', () => getSortedAgentDocs()
+                .filter(([, , docIndex]) => matchesDocTypeFilter(docIndex)));
+        }
+
+        function indexData() {
+            if (TREE_DATA.tree) {
+                indexTree(TREE_DATA.tree);
+            }
+            (EDGES_DATA.edges || []).forEach(edge => {
+                if (edge.source === undefined) edge.source = nodeById[edge.sourceId].path || '.';
+                if (edge.target === undefined) edge.target = nodeById[edge.targetId].path || '.';
+                const outgoing = edgesBySource.get(edge.source);
+                if (outgoing) outgoing.push(edge); else edgesBySource.set(edge.source, [edge]);
+            });
+            buildTokenColumns();
+            buildDocsByDir();
+        }
+
+        // Coalesce zoom, threshold and toggle updates so each render step runs at
+        // most once per animation frame, however many events arrive in between
+        const pendingRenders = new Set();
+        let renderFrame = null;
+
+        function scheduleRender(render) {
+            pendingRenders.add(render);
+            if (renderFrame !== null) return;
+            renderFrame = requestAnimationFrame(() => {
+                renderFrame = null;
+                const renders = Array.from(pendingRenders);
+                pendingRenders.clear();
+                renders.forEach(fn => fn());
+            });
+        }
 
         // Doc type filter state
         let activeDocTypeFilter = 'all';  // 'all', 'claude', or 'agents'
 
-        // Helper to check if a path matches current filter
-        function matchesDocTypeFilter(path) {{
-            if (activeDocTypeFilter === 'all') return true;
-            const filename = path.split('/').pop().toLowerCase();
-            if (activeDocTypeFilter === 'claude') {{
-                return filename === 'claude.md';
-            }}
-            if (activeDocTypeFilter === 'agents') {{
-                return filename === 'agents.md';
-            }}
-            return true;
-        }}
+        // Doc type tags (0 = none), stored per agent doc in agentDocType by buildTokenColumns
+        const DOC_TYPE_CODES = { claude: 1, agents: 2 };
+
+        function docTypeCode(node) {
+            const type = node.agentType || node.name.toLowerCase().replace(/\.md$/, '');
+            return DOC_TYPE_CODES[type] || 0;
+        }
+
+        // Helpers to check a doc type tag, or the agent doc at docIndex, against the current filter
+        function matchesDocTypeCode(code) {
+            return activeDocTypeFilter === 'all' || DOC_TYPE_CODES[activeDocTypeFilter] === code;
+        }
+
+        function matchesDocTypeFilter(docIndex) {
+            return activeDocTypeFilter === 'all' || DOC_TYPE_CODES[activeDocTypeFilter] === agentDocType[docIndex];
+        }
+
+        // Aggregates that only depend on the tree, edges and doc type filter, computed
+        // on first use for each filter value and reused across toggles
+        const filterAggregates = new Map();
+        function cachedForFilter(name, compute) {
+            const key = activeDocTypeFilter + ':' + name;
+            let value = filterAggregates.get(key);
+            if (value === undefined) {
+                value = compute();
+                filterAggregates.set(key, value);
+            }
+            return value;
+        }
 
         // Set doc type filter
-        function setDocTypeFilter(filterType) {{
+        function setDocTypeFilter(filterType) {
             activeDocTypeFilter = filterType;
 
             // Update toggle buttons
-            document.querySelectorAll('.doc-type-btn').forEach(btn => {{
+            document.querySelectorAll('.doc-type-btn').forEach(btn => {
                 btn.classList.toggle('active', btn.dataset.type === filterType);
-            }});
+            });
 
-            // Re-render everything that uses agent doc data
+            scheduleRender(renderDocTypeFilter);
+        }
+
+        // Re-render everything that uses agent doc data
+        function renderDocTypeFilter() {
             updateLinkColors();
             renderAgentDocsRanking();
             renderHeaviestPaths();
             updateHeaderStats();
 
             // Update sidebar if path selected
-            if (selectedPath) {{
+            if (selectedPath) {
                 selectPath(selectedPath);
-            }}
-        }}
-
-        // Calculate cumulative tokens for a path
-        function getCumulativeTokens(path) {{
-            const parts = path === '.' ? ['.'] : path.split('/');
-            let total = 0;
-            const breakdown = [];
-
-            // Check root first (respect filter)
-            for (const docName of ['CLAUDE.md', 'AGENTS.md']) {{
-                const rootPaths = [`./${{docName}}`, docName];
-                for (const rootPath of rootPaths) {{
-                    if (agentDocTokens.has(rootPath) && matchesDocTypeFilter(rootPath)) {{
-                        const tokens = agentDocTokens.get(rootPath);
-                        total += tokens;
-                        breakdown.push({{ file: rootPath, tokens }});
-                        break;
-                    }}
-                }}
-            }}
-
-            // Walk down the path
-            let currentPath = '.';
-            for (let i = 0; i < parts.length; i++) {{
-                if (parts[i] === '.') continue;
-                currentPath = currentPath === '.' ? parts[i] : currentPath + '/' + parts[i];
-
-                // Check for agent docs in this directory (respect filter)
-                const claudePath = currentPath + '/CLAUDE.md';
-                const agentsPath = currentPath + '/AGENTS.md';
-
-                if (agentDocTokens.has(claudePath) && matchesDocTypeFilter(claudePath)) {{
-                    const tokens = agentDocTokens.get(claudePath);
-                    total += tokens;
-                    breakdown.push({{ file: claudePath, tokens }});
-                }}
-                if (agentDocTokens.has(agentsPath) && matchesDocTypeFilter(agentsPath)) {{
-                    const tokens = agentDocTokens.get(agentsPath);
-                    total += tokens;
-                    breakdown.push({{ file: agentsPath, tokens }});
-                }}
-            }}
-
-            return {{ total, breakdown }};
-        }}
+            }
+        }
+
+        // CLAUDE.md/AGENTS.md docs grouped by their directory ('.' for the root), CLAUDE.md
+        // first, so the context chain needs one lookup per directory level
+        const docsByDir = new Map();
+
+        function buildDocsByDir() {
+            agentDocTokens.forEach((tokens, path) => {
+                const name = path.slice(path.lastIndexOf('/') + 1);
+                if (name !== 'CLAUDE.md' && name !== 'AGENTS.md') return;
+                const dir = path.slice(0, -name.length - 1) || '.';
+                const code = name === 'CLAUDE.md' ? DOC_TYPE_CODES.claude : DOC_TYPE_CODES.agents;
+                const docs = docsByDir.get(dir) || [];
+                // The root may be listed as both ./NAME and NAME; only the first counts
+                if (docs.some(doc => doc.code === code)) return;
+                const doc = { file: path, tokens, code };
+                if (code === DOC_TYPE_CODES.claude) docs.unshift(doc); else docs.push(doc);
+                docsByDir.set(dir, docs);
+            });
+        }
+
+        // Agent docs a directory itself contributes to the context chain (respect filter).
+        // The returned array may be shared and must not be modified.
+        function directoryDocs(dirPath) {
+            const docs = docsByDir.get(dirPath);
+            if (!docs) return [];
+            if (activeDocTypeFilter === 'all') return docs;
+            return docs.filter(doc => matchesDocTypeCode(doc.code));
+        }
+
+        // {total, breakdown} for every tree path under the current filter, built in one
+        // DFS that extends the parent's result with each directory's own docs. Files share
+        // their directory's entry. Built lazily, once per filter; index.maxTotal is the
+        // heaviest path's total.
+        function buildCumulativeIndex() {
+            const index = new Map();
+            index.maxTotal = 0;
+
+            function walk(node, inherited) {
+                const path = node.path || '.';
+                if (node.type !== 'directory') {
+                    index.set(path, inherited);
+                    return;
+                }
+                const own = directoryDocs(path);
+                const entry = own.length === 0 ? inherited : {
+                    total: own.reduce((sum, doc) => sum + doc.tokens, inherited.total),
+                    breakdown: inherited.breakdown.concat(own),
+                };
+                index.set(path, entry);
+                if (entry.total > index.maxTotal) index.maxTotal = entry.total;
+                (node.children || []).forEach(child => walk(child, entry));
+            }
+
+            if (TREE_DATA.tree) {
+                walk(TREE_DATA.tree, { total: 0, breakdown: [] });
+            }
+            return index;
+        }
+
+        function getCumulativeIndex() {
+            return cachedForFilter('cumulativeIndex', buildCumulativeIndex);
+        }
+
+        // Calculate cumulative tokens for a path. Tree paths come from the cumulative
+        // index; any other path is walked once and memoized per filter and path (agent
+        // doc tokens are fixed after load, so entries never go stale).
+        const cumulativeCache = new Map();
+
+        function getCumulativeTokens(path) {
+            const indexed = getCumulativeIndex().get(path);
+            if (indexed) return indexed;
+
+            const key = activeDocTypeFilter + '|' + path;
+            let result = cumulativeCache.get(key);
+            if (result === undefined) {
+                result = computeCumulativeTokens(path);
+                cumulativeCache.set(key, result);
+            }
+            return result;
+        }
+
+        // Total only, for callers that color or rank by cost. Entries are shared and
+        // memoized, so no breakdown array is built or copied per call.
+        function getCumulativeTotal(path) {
+            return getCumulativeTokens(path).total;
+        }
+
+        function computeCumulativeTokens(path) {
+            const breakdown = [...directoryDocs('.')];
+
+            // Walk down the path, slicing each directory prefix out of it in place
+            let start = 0;
+            while (path.startsWith('./', start)) start += 2;
+            let pos = path === '.' ? path.length : start;
+            while (pos < path.length) {
+                let end = path.indexOf('/', pos);
+                if (end === -1) end = path.length;
+                breakdown.push(...directoryDocs(path.substring(start, end)));
+                pos = end + 1;
+            }
+
+            const total = breakdown.reduce((sum, doc) => sum + doc.tokens, 0);
+            return { total, breakdown };
+        }
+
+        // Unfiltered cumulative total for a hierarchy node, read from the cumulativeTokens
+        // field tree.py stores on directories (a file loads the same chain as its
+        // directory). Falls back to getCumulativeTokens for filtered views and older data.
+        function getNodeCumulativeTotal(d) {
+            const dir = d.data.type === 'directory' ? d.data : d.parent?.data;
+            if (activeDocTypeFilter === 'all' && dir && dir.cumulativeTokens !== undefined) {
+                return dir.cumulativeTokens;
+            }
+            return getCumulativeTotal(d.data.path);
+        }
 
         // Global threshold state with defaults
-        let tokenThresholds = {{
+        let tokenThresholds = {
             green: 1000,
             yellow: 2000
-        }};
+        };
+
+        // Agent doc token counts as flat columns indexed by node.docIndex, so a threshold
+        // change is one tight loop plus fill writes for the docs that changed color
+        const TOKEN_BUCKET_COLORS = ['var(--green)', 'var(--yellow)', 'var(--red)'];
+        let agentDocTokenColumn, agentDocType, agentDocBucket, agentDocBucketChanged;
+
+        function buildTokenColumns() {
+            agentDocTokenColumn = Uint32Array.from(agentDocTokens.values());
+            agentDocType = Uint8Array.from(agentDocTokens.keys(), path => docTypeCode(getNode(path)));
+            agentDocBucket = new Uint8Array(agentDocTokenColumn.length);
+            agentDocBucketChanged = new Uint8Array(agentDocTokenColumn.length);
+            updateTokenBuckets();
+        }
+
+        // Re-bucket every agent doc against the thresholds; true if any bucket changed
+        function updateTokenBuckets() {
+            const green = tokenThresholds.green;
+            const yellow = tokenThresholds.yellow;
+            let changed = false;
+            for (let i = 0; i < agentDocTokenColumn.length; i++) {
+                const tokens = agentDocTokenColumn[i];
+                const bucket = tokens < green ? 0 : tokens < yellow ? 1 : 2;
+                agentDocBucketChanged[i] = bucket !== agentDocBucket[i] ? 1 : 0;
+                if (agentDocBucketChanged[i]) {
+                    agentDocBucket[i] = bucket;
+                    changed = true;
+                }
+            }
+            return changed;
+        }
 
         // Unified color function used by BOTH agent docs and path weights
-        function getTokenColor(tokens) {{
-            if (tokens < tokenThresholds.green) return 'var(--green)';
-            if (tokens < tokenThresholds.yellow) return 'var(--yellow)';
-            return 'var(--red)';
-        }}
+        // Per-element recolor loops inline the same two comparisons against hoisted thresholds
+        function getTokenColor(tokens) {
+            return TOKEN_BUCKET_COLORS[tokens < tokenThresholds.green ? 0 : tokens < tokenThresholds.yellow ? 1 : 2];
+        }
 
         // Get status text based on token count
-        function getTokenStatus(tokens) {{
+        function getTokenStatus(tokens) {
             if (tokens < tokenThresholds.green) return '✅ OK';
             if (tokens < tokenThresholds.yellow) return '⚠️ Warning';
             return '🔴 High';
-        }}
+        }
 
         // Update legend labels based on thresholds
-        function updateLegendLabels() {{
-            document.getElementById('legend-green-label').textContent = `< ${{tokenThresholds.green.toLocaleString()}} tokens`;
-            document.getElementById('legend-yellow-label').textContent = `${{tokenThresholds.green.toLocaleString()}} - ${{tokenThresholds.yellow.toLocaleString()}} tokens`;
-            document.getElementById('legend-red-label').textContent = `≥ ${{tokenThresholds.yellow.toLocaleString()}} tokens`;
-            document.getElementById('threshold-red-display').textContent = `${{tokenThresholds.yellow.toLocaleString()}} tokens`;
-        }}
+        function updateLegendLabels() {
+            document.getElementById('legend-green-label').textContent = `< ${tokenThresholds.green.toLocaleString()} tokens`;
+            document.getElementById('legend-yellow-label').textContent = `${tokenThresholds.green.toLocaleString()} - ${tokenThresholds.yellow.toLocaleString()} tokens`;
+            document.getElementById('legend-red-label').textContent = `≥ ${tokenThresholds.yellow.toLocaleString()} tokens`;
+            document.getElementById('threshold-red-display').textContent = `${tokenThresholds.yellow.toLocaleString()} tokens`;
+        }
 
         // When thresholds change, re-render everything that uses colors
-        function updateThresholds() {{
+        function updateThresholds() {
             // Get values from inputs
             const greenInput = document.getElementById('threshold-green');
             const yellowInput = document.getElementById('threshold-yellow');
@@ -1089,10 +1443,10 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             const yellowVal = parseInt(yellowInput.value) || 1500;
 
             // Ensure green < yellow
-            if (greenVal >= yellowVal) {{
+            if (greenVal >= yellowVal) {
                 // Auto-adjust yellow to be higher than green
                 yellowInput.value = greenVal + 100;
-            }}
+            }
 
             tokenThresholds.green = parseInt(greenInput.value) || 500;
             tokenThresholds.yellow = parseInt(yellowInput.value) || 1500;
@@ -1100,427 +1454,595 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             // Update legend labels
             updateLegendLabels();
 
-            // Re-color agent doc nodes
-            if (g) {{
-                g.selectAll('g.node.agent-doc circle')
-                    .style('fill', d => getTokenColor(d.data.tokens || 0));
-            }}
+            // Re-color agent doc nodes that moved to another bucket
+            if (updateTokenBuckets() && agentDocDots) {
+                agentDocDots
+                    .filter(d => agentDocBucketChanged[d.data.docIndex])
+                    .style('fill', nodeFill);
+            }
 
             // Re-color path weight links (if in path view)
             updateLinkColors();
 
-            // Re-color sidebar rankings
-            renderAgentDocsRanking();
-            renderHeaviestPaths();
+            // Re-color sidebar rankings; thresholds change neither totals nor order
+            recolorAgentDocsRanking();
+            recolorHeaviestPaths();
 
             // Re-color the path info if a path is selected
-            if (selectedPath) {{
-                const {{ total, breakdown }} = getCumulativeTokens(selectedPath);
+            if (selectedPath) {
+                const { total, breakdown } = getCumulativeTokens(selectedPath);
                 const tokensEl = document.getElementById('path-tokens');
                 tokensEl.style.color = getTokenColor(total);
 
                 const chainEl = document.getElementById('path-chain');
-                if (breakdown.length > 0) {{
+                if (breakdown.length > 0) {
                     chainEl.innerHTML = breakdown.map(item => `
                         <div class="path-chain-item">
-                            <span class="file">${{item.file}}</span>
-                            <span class="tokens" style="color: ${{getTokenColor(item.tokens)}}">${{item.tokens}}</span>
+                            <span class="file">${item.file}</span>
+                            <span class="tokens" style="color: ${getTokenColor(item.tokens)}">${item.tokens}</span>
                         </div>
                     `).join('');
-                }}
-            }}
-        }}
+                }
+            }
+        }
 
         // Toast notification helper
-        function showToast(message) {{
+        function showToast(message) {
             const toast = document.getElementById('toast');
             toast.textContent = message;
             toast.classList.add('show');
             setTimeout(() => toast.classList.remove('show'), 2000);
-        }}
+        }
 
         // Copy to clipboard helper
-        async function copyToClipboard(text) {{
-            try {{
+        async function copyToClipboard(text) {
+            try {
                 await navigator.clipboard.writeText(text);
                 return true;
-            }} catch (err) {{
+            } catch (err) {
                 console.error('Failed to copy:', err);
                 return false;
-            }}
-        }}
+            }
+        }
 
         // Copy context chain report for selected directory
-        function copyContextChainReport() {{
+        function copyContextChainReport() {
             if (!selectedPath) return;
 
-            const {{ total, breakdown }} = getCumulativeTokens(selectedPath);
-
-            let md = `## Context Chain: \`${{selectedPath}}\`\\n\\n`;
-            md += `When Claude works in this directory, these instruction files load:\\n\\n`;
-            md += `| File | Tokens |\\n`;
-            md += `|------|--------|\\n`;
-
-            breakdown.forEach(item => {{
-                md += `| \`${{item.file}}\` | ${{item.tokens.toLocaleString()}} |\\n`;
-            }});
-
-            md += `\\n**Total context cost: ${{total.toLocaleString()}} tokens**\\n`;
-
-            copyToClipboard(md).then(success => {{
+            const { total, breakdown } = getCumulativeTokens(selectedPath);
+
+            const md = [
+                `## Context Chain: \`${selectedPath}\``,
+                '',
+                'When Claude works in this directory, these instruction files load:',
+                '',
+                '| File | Tokens |',
+                '|------|--------|',
+                ...breakdown.map(item => `| \`${item.file}\` | ${item.tokens.toLocaleString()} |`),
+                '',
+                `**Total context cost: ${total.toLocaleString()} tokens**`,
+                '',
+            ].join('\n');
+
+            copyToClipboard(md).then(success => {
                 const btn = document.getElementById('copy-context-chain-btn');
-                if (success) {{
+                if (success) {
                     btn.classList.add('copied');
                     btn.textContent = '✓';
-                    setTimeout(() => {{
+                    setTimeout(() => {
                         btn.classList.remove('copied');
                         btn.textContent = '📋';
-                    }}, 2000);
-                }}
+                    }, 2000);
+                }
                 showToast(success ? 'Context chain copied!' : 'Failed to copy');
-            }});
-        }}
+            });
+        }
 
         // Copy agent docs report
-        function copyAgentDocsReport() {{
-            const sortedDocs = Array.from(agentDocTokens.entries())
-                .sort((a, b) => b[1] - a[1]);
-
-            let md = `## Agent Docs by Token Count\\n\\n`;
-            md += `| File | Tokens | Status |\\n`;
-            md += `|------|--------|--------|\\n`;
-
-            sortedDocs.forEach(([path, tokens]) => {{
-                const status = getTokenStatus(tokens);
-                md += `| \`${{path}}\` | ${{tokens.toLocaleString()}} | ${{status}} |\\n`;
-            }});
-
-            md += `\\n**Thresholds:** Green < ${{tokenThresholds.green.toLocaleString()}}, Yellow < ${{tokenThresholds.yellow.toLocaleString()}}, Red ≥ ${{tokenThresholds.yellow.toLocaleString()}}\\n`;
-
-            copyToClipboard(md).then(success => {{
+        function copyAgentDocsReport() {
+            const sortedDocs = getSortedAgentDocs();
+
+            const md = [
+                '## Agent Docs by Token Count',
+                '',
+                '| File | Tokens | Status |',
+                '|------|--------|--------|',
+                ...sortedDocs.map(([path, tokens]) => `| \`${path}\` | ${tokens.toLocaleString()} | ${getTokenStatus(tokens)} |`),
+                '',
+                `**Thresholds:** Green < ${tokenThresholds.green.toLocaleString()}, Yellow < ${tokenThresholds.yellow.toLocaleString()}, Red ≥ ${tokenThresholds.yellow.toLocaleString()}`,
+                '',
+            ].join('\n');
+
+            copyToClipboard(md).then(success => {
                 showToast(success ? 'Agent docs report copied!' : 'Failed to copy');
-            }});
-        }}
+            });
+        }
 
         // Copy heaviest paths report
-        function copyHeaviestPathsReport() {{
+        function copyHeaviestPathsReport() {
             if (!PATH_WEIGHTS_DATA || !PATH_WEIGHTS_DATA.ranking) return;
 
             const topPaths = PATH_WEIGHTS_DATA.ranking.slice(0, 10);
 
-            let md = `## Heaviest Paths (Cumulative Tokens)\\n\\n`;
-            md += `| Rank | Path | Cumulative Tokens | Status |\\n`;
-            md += `|------|------|-------------------|--------|\\n`;
-
-            topPaths.forEach((item, index) => {{
-                const status = getTokenStatus(item.cumulativeTokens);
-                md += `| ${{index + 1}} | \`${{item.path}}/\` | ${{item.cumulativeTokens.toLocaleString()}} | ${{status}} |\\n`;
-            }});
-
-            md += `\\nThese paths have the highest context cost when Claude works in them.\\n`;
-
-            copyToClipboard(md).then(success => {{
+            const md = [
+                '## Heaviest Paths (Cumulative Tokens)',
+                '',
+                '| Rank | Path | Cumulative Tokens | Status |',
+                '|------|------|-------------------|--------|',
+                ...topPaths.map((item, index) =>
+                    `| ${index + 1} | \`${item.path}/\` | ${item.cumulativeTokens.toLocaleString()} | ${getTokenStatus(item.cumulativeTokens)} |`),
+                '',
+                'These paths have the highest context cost when Claude works in them.',
+                '',
+            ].join('\n');
+
+            copyToClipboard(md).then(success => {
                 showToast(success ? 'Heaviest paths report copied!' : 'Failed to copy');
-            }});
-        }}
+            });
+        }
 
         // Copy token budget report
-        function copyTokenBudgetReport() {{
+        function copyTokenBudgetReport() {
             const budget = 1500;
-            const sortedDocs = Array.from(agentDocTokens.entries())
-                .sort((a, b) => b[1] - a[1]);
+            const sortedDocs = getSortedAgentDocs();
             const overBudget = sortedDocs.filter(([path, tokens]) => tokens > budget);
             const totalTokens = sortedDocs.reduce((sum, [path, tokens]) => sum + tokens, 0);
 
-            let md = `## Token Budget Report\\n\\n`;
-            md += `Generated: ${{new Date().toISOString().split('T')[0]}}\\n\\n`;
-            md += `### Summary\\n`;
-            md += `- **Total agent docs:** ${{sortedDocs.length}}\\n`;
-            md += `- **Total tokens:** ${{totalTokens.toLocaleString()}}\\n`;
-            md += `- **Files over budget (>${{budget}}):** ${{overBudget.length}}\\n\\n`;
-
-            if (overBudget.length > 0) {{
-                md += `### Files Exceeding Budget\\n\\n`;
-                md += `| File | Tokens | Over By |\\n`;
-                md += `|------|--------|---------|\\n`;
-
-                overBudget.forEach(([path, tokens]) => {{
-                    const overBy = tokens - budget;
-                    const ratio = (tokens / budget).toFixed(1);
-                    md += `| \`${{path}}\` | ${{tokens.toLocaleString()}} | +${{overBy.toLocaleString()}} (${{ratio}}x) |\\n`;
-                }});
-
-                md += `\\n### Recommended Actions\\n\\n`;
-                md += `1. **Split large files** - Break files >3000 tokens into subdirectory-specific docs\\n`;
-                md += `2. **Extract shared content** - Move repeated patterns to a shared doc referenced via links\\n`;
-                md += `3. **Use links over duplication** - Reference other docs with \`See [topic](./path/CLAUDE.md)\`\\n\\n`;
-            }}
-
-            md += `### All Agent Docs by Token Count\\n\\n`;
-            md += `| File | Tokens | Status |\\n`;
-            md += `|------|--------|--------|\\n`;
-
-            sortedDocs.forEach(([path, tokens]) => {{
-                const status = tokens > budget ? 'Over' : tokens > 500 ? 'Warning' : 'OK';
-                md += `| \`${{path}}\` | ${{tokens.toLocaleString()}} | ${{status}} |\\n`;
-            }});
-
-            copyToClipboard(md).then(success => {{
+            const lines = [
+                '## Token Budget Report',
+                '',
+                `Generated: ${new Date().toISOString().split('T')[0]}`,
+                '',
+                '### Summary',
+                `- **Total agent docs:** ${sortedDocs.length}`,
+                `- **Total tokens:** ${totalTokens.toLocaleString()}`,
+                `- **Files over budget (>${budget}):** ${overBudget.length}`,
+                '',
+            ];
+
+            if (overBudget.length > 0) {
+                lines.push(
+                    '### Files Exceeding Budget',
+                    '',
+                    '| File | Tokens | Over By |',
+                    '|------|--------|---------|',
+                    ...overBudget.map(([path, tokens]) => {
+                        const overBy = tokens - budget;
+                        const ratio = (tokens / budget).toFixed(1);
+                        return `| \`${path}\` | ${tokens.toLocaleString()} | +${overBy.toLocaleString()} (${ratio}x) |`;
+                    }),
+                    '',
+                    '### Recommended Actions',
+                    '',
+                    '1. **Split large files** - Break files >3000 tokens into subdirectory-specific docs',
+                    '2. **Extract shared content** - Move repeated patterns to a shared doc referenced via links',
+                    '3. **Use links over duplication** - Reference other docs with `See [topic](./path/CLAUDE.md)`',
+                    '',
+                );
+            }
+
+            lines.push(
+                '### All Agent Docs by Token Count',
+                '',
+                '| File | Tokens | Status |',
+                '|------|--------|--------|',
+                ...sortedDocs.map(([path, tokens]) => {
+                    const status = tokens > budget ? 'Over' : tokens > 500 ? 'Warning' : 'OK';
+                    return `| \`${path}\` | ${tokens.toLocaleString()} | ${status} |`;
+                }),
+                '',
+            );
+            const md = lines.join('\n');
+
+            copyToClipboard(md).then(success => {
                 showToast(success ? 'Budget report copied!' : 'Failed to copy');
-            }});
-        }}
+            });
+        }
 
         // Render header stats
-        function renderHeaderStats() {{
+        function renderHeaderStats() {
             updateHeaderStats();
-        }}
+        }
 
         // Update header stats (respects doc type filter)
-        function updateHeaderStats() {{
+        function updateHeaderStats() {
             const el = document.getElementById('header-stats');
 
             // Calculate filtered stats
-            const filteredDocs = Array.from(agentDocTokens.entries())
-                .filter(([path, tokens]) => matchesDocTypeFilter(path));
-            const totalDocs = filteredDocs.length;
-            const totalTokens = filteredDocs.reduce((sum, [path, tokens]) => sum + tokens, 0);
+            const { totalDocs, totalTokens } = cachedForFilter('docStats', () => {
+                // One pass over the token and doc type columns, no per-doc allocations
+                let totalDocs = 0, totalTokens = 0;
+                for (let docIndex = 0; docIndex < agentDocTokenColumn.length; docIndex++) {
+                    if (matchesDocTypeFilter(docIndex)) {
+                        totalDocs++;
+                        totalTokens += agentDocTokenColumn[docIndex];
+                    }
+                }
+                return { totalDocs, totalTokens };
+            });
             const edgeCount = EDGES_DATA.edges?.length || 0;
 
             // Show filter indicator if not showing all
-            const filterLabel = activeDocTypeFilter === 'all' ? '' : ` (${{activeDocTypeFilter === 'claude' ? 'CLAUDE.md' : 'AGENTS.md'}})`;
+            const filterLabel = activeDocTypeFilter === 'all' ? '' : ` (${activeDocTypeFilter === 'claude' ? 'CLAUDE.md' : 'AGENTS.md'})`;
 
             el.innerHTML = `
                 <div class="header-stat">
-                    <span class="header-stat-value">${{totalDocs}}</span>
-                    <span class="header-stat-label">agent docs${{filterLabel}}</span>
+                    <span class="header-stat-value">${totalDocs}</span>
+                    <span class="header-stat-label">agent docs${filterLabel}</span>
                 </div>
                 <div class="header-stat">
-                    <span class="header-stat-value">${{totalTokens.toLocaleString()}}</span>
+                    <span class="header-stat-value">${totalTokens.toLocaleString()}</span>
                     <span class="header-stat-label">total tokens</span>
                 </div>
                 <div class="header-stat">
-                    <span class="header-stat-value">${{edgeCount}}</span>
+                    <span class="header-stat-value">${edgeCount}</span>
                     <span class="header-stat-label">references</span>
                 </div>
             `;
-        }}
+        }
 
         // View mode state
         let currentViewMode = 'reference';
 
         // Path weight helper functions - use unified color system
-        function getPathWeightColor(cumulativeTokens) {{
+        function getPathWeightColor(cumulativeTokens) {
             // Use the same unified getTokenColor function with user-configurable thresholds
             return getTokenColor(cumulativeTokens);
-        }}
+        }
 
-        function getPathWeightStrokeWidth(cumulativeTokens) {{
+        function getPathWeightStrokeWidth(cumulativeTokens) {
             const maxWeight = PATH_WEIGHTS_DATA?.metadata?.maxPathWeight || 1;
             const ratio = cumulativeTokens / maxWeight;
             return 1 + ratio * 2; // 1-3px
-        }}
+        }
 
-        function setViewMode(mode) {{
+        function setViewMode(mode) {
             currentViewMode = mode;
 
             // Update toggle buttons
-            document.querySelectorAll('.view-toggle-btn').forEach(btn => {{
+            document.querySelectorAll('.view-toggle-btn').forEach(btn => {
                 btn.classList.toggle('active', btn.dataset.mode === mode);
-            }});
+            });
+
+            scheduleRender(renderViewMode);
+        }
 
-            // Update link colors and edge visibility
+        // Update link colors and edge visibility
+        function renderViewMode() {
             updateLinkColors();
             updateEdgeVisibility();
-        }}
+        }
 
-        function updateLinkColors() {{
+        function updateLinkColors() {
             if (!g) return;
 
-            // Reset all link styles first
+            // In path view, color links by cumulative tokens (respecting filter); other
+            // links get their stylesheet styling back
+            const pathView = currentViewMode === 'path' && PATH_WEIGHTS_DATA;
+            // Max weight for current filter
+            const maxFilteredWeight = pathView ? getCumulativeIndex().maxTotal : 0;
+            const green = tokenThresholds.green;
+            const yellow = tokenThresholds.yellow;
+
+            // Styling is computed onto the link target, which the canvas overview shares,
+            // then written with one style() pass per property
             g.selectAll('path.link')
-                .style('stroke', null)
-                .style('stroke-width', null);
-
-            // In path view, color links by cumulative tokens (respecting filter)
-            if (currentViewMode === 'path' && PATH_WEIGHTS_DATA) {{
-                // Recalculate max weight for current filter
-                let maxFilteredWeight = 0;
-                Object.keys(PATH_WEIGHTS_DATA.pathWeights).forEach(path => {{
-                    const {{ total }} = getCumulativeTokens(path);
-                    if (total > maxFilteredWeight) maxFilteredWeight = total;
-                }});
-
-                g.selectAll('path.link').each(function(d) {{
-                    const targetPath = d.target.data.path;
+                .each(d => {
                     // Recalculate tokens with current filter
-                    const {{ total: cumulativeTokens }} = getCumulativeTokens(targetPath);
-
-                    if (cumulativeTokens > 0) {{
-                        const color = getPathWeightColor(cumulativeTokens);
+                    const cumulativeTokens = pathView ? getNodeCumulativeTotal(d.target) : 0;
+                    if (cumulativeTokens > 0) {
                         // Calculate width based on filtered max
                         const ratio = maxFilteredWeight > 0 ? cumulativeTokens / maxFilteredWeight : 0;
-                        const width = 1 + ratio * 2; // 1-3px
-                        d3.select(this)
-                            .style('stroke', color)
-                            .style('stroke-width', width + 'px');
-                    }}
-                }});
-            }}
-        }}
-
-        function updateEdgeVisibility() {{
+                        d.target.pathColor = TOKEN_BUCKET_COLORS[cumulativeTokens < green ? 0 : cumulativeTokens < yellow ? 1 : 2];
+                        d.target.pathWidth = 1 + ratio * 2; // 1-3px
+                    } else {
+                        d.target.pathColor = d.target.pathWidth = null;
+                    }
+                })
+                .style('stroke', d => d.target.pathColor)
+                .style('stroke-width', d => d.target.pathWidth === null ? null : d.target.pathWidth + 'px');
+
+            drawOverview();
+        }
+
+        function updateEdgeVisibility() {
             if (!g) return;
 
             // In path view, dim reference edges significantly
-            // In reference view, show them normally
-            g.selectAll('.edge')
-                .classed('dimmed', currentViewMode === 'path');
-        }}
+            // In reference view, show them normally. A single class on the svg lets the
+            // stylesheet restyle every edge, including ones drawn later by renderEdges
+            svg.classed('view-path', currentViewMode === 'path');
+        }
 
-        function renderHeaviestPaths() {{
+        function renderHeaviestPaths() {
             const section = document.getElementById('heaviest-paths-section');
             const container = document.getElementById('heaviest-paths-list');
 
-            if (!PATH_WEIGHTS_DATA || !PATH_WEIGHTS_DATA.ranking || PATH_WEIGHTS_DATA.ranking.length === 0) {{
+            if (!PATH_WEIGHTS_DATA || !PATH_WEIGHTS_DATA.ranking || PATH_WEIGHTS_DATA.ranking.length === 0) {
                 section.style.display = 'none';
                 return;
-            }}
+            }
 
             section.style.display = 'block';
 
-            // Recalculate path weights based on current filter
-            const recalculatedPaths = PATH_WEIGHTS_DATA.ranking.map(item => {{
-                const {{ total }} = getCumulativeTokens(item.path);
-                return {{ path: item.path, cumulativeTokens: total }};
-            }}).filter(item => item.cumulativeTokens > 0)
-              .sort((a, b) => b.cumulativeTokens - a.cumulativeTokens);
+            // Path weights for the current filter
+            const recalculatedPaths = cachedForFilter('heaviestPaths', () =>
+                PATH_WEIGHTS_DATA.ranking.map(item => {
+                    const total = getCumulativeTotal(item.path);
+                    return { path: item.path, cumulativeTokens: total };
+                }).filter(item => item.cumulativeTokens > 0)
+                  .sort((a, b) => b.cumulativeTokens - a.cumulativeTokens)
+            );
 
-            if (recalculatedPaths.length === 0) {{
+            if (recalculatedPaths.length === 0) {
                 const filterMsg = activeDocTypeFilter === 'all'
                     ? 'No paths with agent docs'
-                    : `No paths with ${{activeDocTypeFilter === 'claude' ? 'CLAUDE.md' : 'AGENTS.md'}} files`;
-                container.innerHTML = `<div style="color: var(--text-muted); font-size: 11px; padding: 8px;">${{filterMsg}}</div>`;
+                    : `No paths with ${activeDocTypeFilter === 'claude' ? 'CLAUDE.md' : 'AGENTS.md'} files`;
+                container.innerHTML = `<div style="color: var(--text-muted); font-size: 11px; padding: 8px;">${filterMsg}</div>`;
                 return;
-            }}
+            }
 
             // Show top 10 paths
             const topPaths = recalculatedPaths.slice(0, 10);
 
-            container.innerHTML = topPaths.map((item, index) => `
-                <div class="heaviest-path-item" data-path="${{item.path}}">
-                    <span class="rank">${{index + 1}}.</span>
-                    <span class="path" title="${{item.path}}">${{item.path}}/</span>
-                    <span class="tokens" style="color: ${{getPathWeightColor(item.cumulativeTokens)}}">${{item.cumulativeTokens.toLocaleString()}}</span>
-                </div>
-            `).join('');
-
-            // Add click handlers
-            container.querySelectorAll('.heaviest-path-item').forEach(item => {{
-                item.addEventListener('click', () => {{
-                    const path = item.dataset.path;
-                    expandToPath(path + '/dummy'); // Add dummy to expand the target dir
-                    selectPath(path);
-                }});
-            }});
-        }}
+            // Keyed join: rows are created once per path and only their rank and
+            // token cells are rewritten on later renders. Clicks are delegated to the
+            // container (onHeaviestPathClick).
+            if (!container.querySelector('.heaviest-path-item')) container.innerHTML = '';
+            d3.select(container)
+                .selectAll('.heaviest-path-item')
+                .data(topPaths, item => item.path)
+                .join(enter => {
+                    const item = enter.append('div')
+                        .attr('class', 'heaviest-path-item')
+                        .attr('data-path', d => d.path);
+                    item.append('span').attr('class', 'rank');
+                    item.append('span')
+                        .attr('class', 'path')
+                        .attr('title', d => d.path)
+                        .text(d => d.path + '/');
+                    item.append('span').attr('class', 'tokens');
+                    return item;
+                })
+                .call(item => item.select('.rank').text((d, i) => `${i + 1}.`))
+                .call(item => item.select('.tokens')
+                    .style('color', d => getPathWeightColor(d.cumulativeTokens))
+                    .text(d => d.cumulativeTokens.toLocaleString()));
+        }
+
+        function onHeaviestPathClick(event) {
+            const item = event.target.closest('.heaviest-path-item');
+            if (!item) return;
+            const path = item.dataset.path;
+            expandToPath(path + '/dummy'); // Add dummy to expand the target dir
+            selectPath(path);
+        }
+
+        // Re-color the rendered heaviest paths rows from their bound data
+        function recolorHeaviestPaths() {
+            const green = tokenThresholds.green;
+            const yellow = tokenThresholds.yellow;
+            d3.select('#heaviest-paths-list')
+                .selectAll('.heaviest-path-item .tokens')
+                .style('color', ({ cumulativeTokens: t }) => TOKEN_BUCKET_COLORS[t < green ? 0 : t < yellow ? 1 : 2]);
+        }
 
         // D3 Tree Visualization
         let root, svg, g, treeLayout;
         let selectedPath = null;
+        // Nodes marked highlighted by the last selectPath() call
+        let highlightedChain = [];
         let selectedAgentDoc = null;
         let initialRenderComplete = false;
 
+        // Visible hierarchy nodes grouped by depth, keyed by path and indexed by node id,
+        // rebuilt by every update()
+        let nodesByDepth = new Map();
+        let nodesByPath = new Map();
+        const visibleNodeById = [];
+
+        // Shapes of the rendered agent doc nodes, rebuilt by every update() so threshold
+        // changes skip a selector scan over all nodes
+        let agentDocDots = null;
+
+        // Transform currently applied to g, used to find the visible tree area
+        let viewTransform = d3.zoomIdentity;
+
+        // Zoom scale limits for the tree view
+        const MIN_ZOOM = 0.1;
+        const MAX_ZOOM = 4;
+
+        // Viewport culling: elements this far (in tree units) outside the viewport stay drawn,
+        // and subtrees shorter than MIN_SUBTREE_PX on screen are drawn as their root only.
+        // A subtree's on-screen height is (rows * NODE_SPACING) * scale, so at MIN_ZOOM this
+        // collapses subtrees of up to two rows, and one-row subtrees below scale 0.25
+        const CULL_MARGIN = 200;
+        const NODE_SPACING = 24;
+        const MIN_SUBTREE_PX = 2.5 * NODE_SPACING * MIN_ZOOM;
+
+        // Nodes and links drawn by the last update(), with their elements in the same
+        // order, and the zoom scale the level of detail was last computed for
+        let cullNodes = [], cullNodeElements = [];
+        let cullLinks = [], cullLinkElements = [];
+        let lodScale = null;
+
+        // Below this zoom scale the tree is painted to #tree-canvas instead of the SVG,
+        // and hover/click find nodes through a quadtree within OVERVIEW_HIT_RADIUS pixels
+        const OVERVIEW_SCALE = 0.3;
+        const OVERVIEW_HIT_RADIUS = 8;
+        let overviewCanvas = null, overviewContext = null, nodeQuadtree = null;
+        let overviewHoverNode = null;
+
+        // Reference edges take no pointer events; the svg finds the edge whose
+        // midpoint is nearest the pointer, within EDGE_HIT_RADIUS pixels
+        const EDGE_HIT_RADIUS = 12;
+        let edgeQuadtree = null, hoverEdge = null;
+
+        // Curves of the drawn reference edges for the canvas overview, packed by
+        // renderEdges() as x0, y0, cx, cy, x1, y1 per edge, with each edge's type alongside
+        const EDGE_CURVE_STRIDE = 6;
+        const EDGE_DASHES = { 'agent-doc': [], file: [4, 3], directory: [2, 2] };
+        let edgeCurves = new Float32Array(0), edgeCurveTypes = [];
+
+        // Path element drawn for each edge, so highlighting needs no DOM reads
+        const edgeElements = new Map();
+
         // Depth tracking for level-by-level expand/collapse
         let maxTreeDepth = 0;
         let currentVisibleDepth = 2;
-
-        // Calculate max depth from tree data
-        function calculateMaxDepth(node, depth = 0) {{
-            maxTreeDepth = Math.max(maxTreeDepth, depth);
-            if (node.children) {{
-                node.children.forEach(child => calculateMaxDepth(child, depth + 1));
-            }}
-        }}
+        // Depth requested by the level buttons; applied once per frame by applyLevelChange()
+        let targetVisibleDepth = currentVisibleDepth;
 
         // Update depth display in controls
-        function updateDepthDisplay() {{
+        function updateDepthDisplay() {
             // Update depth
             const depthEl = document.getElementById('depth-status');
-            depthEl.innerHTML = `Depth: <span class="current">${{currentVisibleDepth}}</span> / ${{maxTreeDepth}}`;
+            depthEl.innerHTML = `Depth: <span class="current">${currentVisibleDepth}</span> / ${maxTreeDepth}`;
 
             // Update selected agent doc
             const selectedEl = document.getElementById('selected-status');
-            if (selectedAgentDoc) {{
+            if (selectedAgentDoc) {
                 const name = selectedAgentDoc.split('/').pop();
-                selectedEl.innerHTML = `Selected: <span class="selected-name" title="${{selectedAgentDoc}}">${{name}}</span>`;
-            }} else {{
+                selectedEl.innerHTML = `Selected: <span class="selected-name" title="${selectedAgentDoc}">${name}</span>`;
+            } else {
                 selectedEl.innerHTML = `Selected: <span class="none">None</span>`;
-            }}
-        }}
+            }
+        }
 
         // Expand one more level
-        function expandLevel() {{
-            if (currentVisibleDepth >= maxTreeDepth) return;
-            currentVisibleDepth++;
-
-            root.descendants().forEach(d => {{
-                // Expand nodes at the new visible depth - 1 (their children become visible)
-                if (d.depth === currentVisibleDepth - 1 && d._children) {{
-                    d.children = d._children;
-                    d._children = null;
-                }}
-            }});
-
-            update(root);
-            renderEdges();
-            updateEdgeVisibility();
-            updateDepthDisplay();
-        }}
+        function expandLevel() {
+            if (targetVisibleDepth >= maxTreeDepth) return;
+            targetVisibleDepth++;
+            scheduleRender(applyLevelChange);
+        }
 
         // Collapse one level
-        function collapseLevel() {{
-            if (currentVisibleDepth <= 1) return;
+        function collapseLevel() {
+            if (targetVisibleDepth <= 1) return;
+            targetVisibleDepth--;
+            scheduleRender(applyLevelChange);
+        }
+
+        // Step the visible depth to targetVisibleDepth, then lay out and render once
+        // however many level clicks queued up
+        function applyLevelChange() {
+            if (targetVisibleDepth === currentVisibleDepth) return;
+
+            while (currentVisibleDepth < targetVisibleDepth) {
+                currentVisibleDepth++;
+                (nodesByDepth.get(currentVisibleDepth - 1) || []).forEach(d => {
+                    // Expand nodes at the new visible depth - 1 (their children become visible)
+                    if (d._children) {
+                        d.children = d._children;
+                        d._children = null;
+                        // Bucket the revealed subtrees so a further level step sees them
+                        d.children.forEach(c => c.each(n => {
+                            const level = nodesByDepth.get(n.depth);
+                            if (level) level.push(n); else nodesByDepth.set(n.depth, [n]);
+                        }));
+                    }
+                });
+            }
+
+            while (currentVisibleDepth > targetVisibleDepth) {
+                (nodesByDepth.get(currentVisibleDepth - 1) || []).forEach(d => {
+                    // Collapse nodes at the current visible depth - 1 (hide their children)
+                    if (d.children) {
+                        d._children = d.children;
+                        d.children = null;
+                    }
+                });
+                currentVisibleDepth--;
+            }
 
-            root.descendants().forEach(d => {{
-                // Collapse nodes at the current visible depth - 1 (hide their children)
-                if (d.depth === currentVisibleDepth - 1 && d.children) {{
-                    d._children = d.children;
-                    d.children = null;
-                }}
-            }});
-
-            currentVisibleDepth--;
             update(root);
             renderEdges();
-            updateEdgeVisibility();
             updateDepthDisplay();
-        }}
+        }
 
-        function initTree() {{
+        function initTree() {
             const treeData = TREE_DATA.tree;
             if (!treeData) return;
 
-            // Calculate max depth for level controls
-            calculateMaxDepth(treeData);
-
             const container = document.querySelector('.tree-container');
-            const margin = {{ top: 20, right: 120, bottom: 20, left: 80 }};
+            const margin = { top: 20, right: 120, bottom: 20, left: 80 };
             const width = Math.max(800, container.clientWidth);
 
             svg = d3.select('#tree')
                 .attr('width', '100%')
                 .attr('height', '100%');
 
+            // One shared symbol per node shape (and its glow); nodes reference them with <use>
+            const defs = svg.select('defs');
+            Object.entries(NODE_SHAPE_RADII).forEach(([shape, r]) => {
+                defs.append('symbol')
+                    .attr('id', `node-${shape}`)
+                    .attr('overflow', 'visible')
+                    .append('circle')
+                    .attr('r', r);
+                defs.append('symbol')
+                    .attr('id', `node-${shape}-glow`)
+                    .attr('overflow', 'visible')
+                    .append('circle')
+                    .attr('r', r + 5);
+            });
+
             g = svg.append('g')
-                .attr('transform', `translate(${{margin.left}},${{margin.top}})`);
+                .attr('transform', `translate(${margin.left},${margin.top})`);
+
+            // Node pointer handlers are delegated from g, so entering nodes register none
+            g.on('click', nodeEventHandler(onNodeClick))
+                .on('dblclick', nodeEventHandler(onNodeDblClick))
+                .on('mouseover', nodeEventHandler(showTooltip))
+                .on('mouseout', nodeEventHandler(hideTooltip));
 
             // Add zoom behavior
             const zoom = d3.zoom()
-                .scaleExtent([0.1, 4])
+                .scaleExtent([MIN_ZOOM, MAX_ZOOM])
                 .translateExtent([[-Infinity, -Infinity], [Infinity, Infinity]])
-                .on('zoom', (event) => {{
-                    g.attr('transform', event.transform);
-                }});
+                .on('zoom', (event) => {
+                    viewTransform = event.transform;
+                    scheduleRender(applyViewTransform);
+                });
+
+            overviewCanvas = document.getElementById('tree-canvas');
+            overviewContext = overviewCanvas.getContext('2d');
+
+            // Pointer handling for nodes drawn on the overview canvas; registered before
+            // the zoom behavior so a double-click on a node doesn't also zoom in
+            svg.on('mousemove.overview', (event) => {
+                    const d = overviewNodeAt(event);
+                    if (d) {
+                        showTooltip(event, d);
+                    } else if (overviewHoverNode) {
+                        hideTooltip();
+                    }
+                    overviewHoverNode = d;
+                })
+                .on('mouseleave.overview', () => {
+                    if (overviewHoverNode) hideTooltip();
+                    overviewHoverNode = null;
+                })
+                .on('click.overview', (event) => {
+                    const d = overviewNodeAt(event);
+                    if (d) onNodeClick(event, d);
+                })
+                .on('dblclick.overview', (event) => {
+                    const d = overviewNodeAt(event);
+                    if (d) {
+                        event.stopImmediatePropagation();
+                        onNodeDblClick(event, d);
+                    }
+                })
+                .on('mousemove.edges', (event) => {
+                    // Nodes keep their own tooltip
+                    if (overviewHoverNode || event.target.closest?.('g.node')) {
+                        setHoverEdge(null, event, false);
+                    } else {
+                        setHoverEdge(edgeAt(event), event);
+                    }
+                })
+                .on('mouseleave.edges', () => setHoverEdge(null));
 
             svg.call(zoom);
 
@@ -1532,23 +2054,25 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             root.x0 = 0;
             root.y0 = 0;
 
+            // Max depth for level controls; d3.hierarchy already measured it
+            maxTreeDepth = root.height;
+
             // Initially collapse some nodes (depth > currentVisibleDepth)
-            root.descendants().forEach((d, i) => {{
-                if (d.depth >= currentVisibleDepth && d.children) {{
+            root.descendants().forEach((d, i) => {
+                if (d.depth >= currentVisibleDepth && d.children) {
                     d._children = d.children;
                     d.children = null;
-                }}
-            }});
+                }
+            });
 
-            treeLayout = d3.tree().nodeSize([24, 180]);
+            treeLayout = d3.tree().nodeSize([NODE_SPACING, 180]);
 
             update(root);
             renderEdges();
-            updateEdgeVisibility();
             updateDepthDisplay();
-        }}
+        }
 
-        function update(source) {{
+        function update(source) {
             const duration = 250;
 
             // Compute new tree layout
@@ -1558,76 +2082,50 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             const nodes = root.descendants();
             const links = root.links();
 
-            // Normalize for fixed-depth
-            nodes.forEach(d => {{
+            // Normalize for fixed-depth, bucketing nodes by depth for the level controls and
+            // indexing them by path for lookups from the sidebar and selection
+            nodesByDepth = new Map();
+            nodesByPath = new Map();
+            visibleNodeById.length = 0;
+            nodes.forEach(d => {
                 d.y = d.depth * 180;
-            }});
+                visibleNodeById[d.data.id] = d;
+                const level = nodesByDepth.get(d.depth);
+                if (level) level.push(d); else nodesByDepth.set(d.depth, [d]);
+                if (!nodesByPath.has(d.data.path)) nodesByPath.set(d.data.path, d);
+            });
 
             // Calculate bounds - only set initial position on first render
-            if (!initialRenderComplete) {{
+            if (!initialRenderComplete) {
                 let minX = Infinity;
-                nodes.forEach(d => {{
+                nodes.forEach(d => {
                     if (d.x < minX) minX = d.x;
-                }});
-                g.attr('transform', `translate(80,${{-minX + 20}})`);
+                });
+                viewTransform = d3.zoomIdentity.translate(80, -minX + 20);
+                g.attr('transform', viewTransform);
                 initialRenderComplete = true;
-            }}
+            }
 
             // Update nodes
             const node = g.selectAll('g.node')
-                .data(nodes, d => d.data.path);
-
-            // Enter new nodes
-            const nodeEnter = node.enter().append('g')
-                .attr('class', d => {{
-                    let classes = 'node';
-                    if (d.data.type === 'directory') classes += ' directory';
-                    else classes += ' file';
-                    if (d.data.isAgentDoc) classes += ' agent-doc';
-                    if (d._children) classes += ' collapsed';
-                    return classes;
-                }})
-                .attr('transform', d => `translate(${{source.y0}},${{source.x0}})`)
-                .on('click', (event, d) => {{
-                    event.stopPropagation();
-                    // Single click = select for random walk
-                    if (d.data.type === 'directory') {{
-                        selectPath(d.data.path);
-                    }} else if (d.data.isAgentDoc) {{
-                        if (selectedAgentDoc === d.data.path) {{
-                            clearAllHighlighting();  // Deselect if already selected
-                        }} else {{
-                            selectAgentDoc(d.data.path);
-                        }}
-                    }}
-                }})
-                .on('dblclick', (event, d) => {{
-                    event.stopPropagation();
-                    // Double click = toggle expand/collapse (directories only)
-                    if (d.data.type === 'directory') {{
-                        if (d.children) {{
-                            d._children = d.children;
-                            d.children = null;
-                        }} else if (d._children) {{
-                            d.children = d._children;
-                            d._children = null;
-                        }}
-                        update(d);
-                        renderEdges();
-                        updateEdgeVisibility();
-                    }}
-                }})
-                .on('mouseover', showTooltip)
-                .on('mouseout', hideTooltip);
-
-            nodeEnter.append('circle')
-                .attr('r', d => d.data.isAgentDoc ? 7 : (d.data.type === 'directory' ? 5 : 4))
-                .style('fill', d => {{
-                    if (d.data.isAgentDoc) {{
-                        return getTokenColor(d.data.tokens || 0);
-                    }}
-                    return d.data.type === 'directory' ? 'var(--bg-tertiary)' : 'var(--text-muted)';
-                }});
+                .data(nodes, d => d.data.id);
+
+            // Enter new nodes into a detached fragment, attached below in one append
+            const nodeFragment = document.createDocumentFragment();
+            const nodeEnter = d3.select(nodeFragment).selectAll('g.node')
+                .data(node.enter().data())
+                .enter().append('svg:g')
+                .attr('class', classFor)
+                .attr('transform', d => `translate(${source.y0},${source.x0})`);
+
+            nodeEnter.append('use')
+                .attr('class', 'glow')
+                .attr('href', d => `#node-${nodeShape(d)}-glow`);
+
+            nodeEnter.append('use')
+                .attr('class', 'dot')
+                .attr('href', d => `#node-${nodeShape(d)}`)
+                .style('fill', nodeFill);
 
             nodeEnter.append('text')
                 .attr('dy', 3)
@@ -1635,154 +2133,530 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
                 .attr('text-anchor', d => d.children || d._children ? 'end' : 'start')
                 .text(d => d.data.type === 'directory' ? d.data.name + '/' : d.data.name);
 
+            // Nodes go in front of the first reference edge so edges paint on top
+            g.node().insertBefore(nodeFragment, g.node().querySelector(':scope > .edge'));
+
             // Update existing nodes
-            const nodeUpdate = nodeEnter.merge(node);
+            const nodeUpdate = d3.selectAll([...nodeEnter.nodes(), ...node.nodes()]);
 
             nodeUpdate.transition()
                 .duration(duration)
-                .attr('transform', d => `translate(${{d.y}},${{d.x}})`);
+                .attr('transform', d => `translate(${d.y},${d.x})`);
 
-            nodeUpdate.attr('class', d => {{
-                let classes = 'node';
-                if (d.data.type === 'directory') classes += ' directory';
-                else classes += ' file';
-                if (d.data.isAgentDoc) classes += ' agent-doc';
-                if (d._children) classes += ' collapsed';
-                return classes;
-            }});
+            nodeUpdate.attr('class', classFor);
 
             // Update circle fill colors for all nodes (not just new ones)
             // Use .style() instead of .attr() for higher CSS specificity
-            nodeUpdate.select('circle')
-                .style('fill', d => {{
-                    if (d.data.isAgentDoc) {{
-                        return getTokenColor(d.data.tokens || 0);
-                    }}
-                    return d.data.type === 'directory' ? 'var(--bg-tertiary)' : 'var(--text-muted)';
-                }});
+            nodeUpdate.select('.dot')
+                .style('fill', nodeFill);
+
+            agentDocDots = nodeUpdate.filter('.agent-doc').select('.dot');
+            cullNodes = nodeUpdate.data();
+            cullNodeElements = nodeUpdate.nodes();
 
             // Remove old nodes
             node.exit().transition()
                 .duration(duration)
-                .attr('transform', d => `translate(${{source.y}},${{source.x}})`)
+                .attr('transform', d => `translate(${source.y},${source.x})`)
                 .remove();
 
             // Update links
             const link = g.selectAll('path.link')
                 .data(links, d => d.target.data.path);
 
-            const linkEnter = link.enter().insert('path', 'g')
+            // Links go in front of the first node group so nodes paint on top
+            const linkFragment = document.createDocumentFragment();
+            const linkEnter = d3.select(linkFragment).selectAll('path.link')
+                .data(link.enter().data())
+                .enter().append('svg:path')
                 .attr('class', 'link')
-                .attr('d', d => {{
-                    const o = {{ x: source.x0, y: source.y0 }};
+                .classed('highlighted', d => selectedPath !== null && d.target.highlighted)
+                .attr('d', d => {
+                    const o = { x: source.x0, y: source.y0 };
                     return diagonal(o, o);
-                }});
+                });
+
+            g.node().insertBefore(linkFragment, g.node().querySelector(':scope > g'));
+
+            const linkUpdate = d3.selectAll([...linkEnter.nodes(), ...link.nodes()]);
+            cullLinks = linkUpdate.data();
+            cullLinkElements = linkUpdate.nodes();
 
-            linkEnter.merge(link).transition()
+            linkUpdate.transition()
                 .duration(duration)
                 .attr('d', d => diagonal(d.source, d.target));
 
             link.exit().transition()
                 .duration(duration)
-                .attr('d', d => {{
-                    const o = {{ x: source.x, y: source.y }};
+                .attr('d', d => {
+                    const o = { x: source.x, y: source.y };
                     return diagonal(o, o);
-                }})
+                })
                 .remove();
 
             // Store positions for next update
-            nodes.forEach(d => {{
+            nodes.forEach(d => {
                 d.x0 = d.x;
                 d.y0 = d.y;
-            }});
-        }}
-
-        function diagonal(s, d) {{
-            return `M ${{s.y}} ${{s.x}}
-                    C ${{(s.y + d.y) / 2}} ${{s.x}},
-                      ${{(s.y + d.y) / 2}} ${{d.x}},
-                      ${{d.y}} ${{d.x}}`;
-        }}
+            });
+
+            // Vertical extent of each visible subtree, for level-of-detail culling
+            root.eachAfter(d => {
+                d.spanMin = d.spanMax = d.x;
+                if (d.children) {
+                    d.children.forEach(c => {
+                        if (c.spanMin < d.spanMin) d.spanMin = c.spanMin;
+                        if (c.spanMax > d.spanMax) d.spanMax = c.spanMax;
+                    });
+                }
+            });
+
+            applyViewportCulling();
+            // The selected node's glow may have been re-created by the join
+            observeSelectedPulse();
+        }
+
+        // Per frame, only cull elements whose visibility flipped; the level of detail
+        // and overview quadtree are recomputed only when the zoom scale changes
+        function applyViewTransform() {
+            g.attr('transform', viewTransform);
+            if (!root) return;
+            if (viewTransform.k !== lodScale) applyLevelOfDetail(false);
+            cullToViewport(false);
+            drawOverview();
+        }
+
+        // Full culling pass after a layout change: recompute the level of detail and
+        // rewrite every element's culled class (update() resets node classes)
+        function applyViewportCulling() {
+            if (!g || !root) return;
+            applyLevelOfDetail(true);
+            cullToViewport(true);
+            drawOverview();
+        }
+
+        // Hide the descendants of subtrees too small to make out at the current zoom,
+        // rebuilding the overview quadtree when the set of drawn nodes changed
+        function applyLevelOfDetail(rebuild) {
+            const k = viewTransform.k;
+            lodScale = k;
+            let changed = rebuild;
+            root.eachBefore(d => {
+                const hidden = !!d.parent && (d.parent.lodHidden || d.parent.lodCollapsed);
+                if (hidden !== d.lodHidden) changed = true;
+                d.lodHidden = hidden;
+                d.lodCollapsed = !hidden && !!d.children &&
+                    (d.spanMax - d.spanMin + NODE_SPACING) * k < MIN_SUBTREE_PX;
+            });
+
+            // Overview hit-testing only sees nodes that are actually drawn
+            if (changed) {
+                nodeQuadtree = d3.quadtree()
+                    .x(d => d.y)
+                    .y(d => d.x)
+                    .addAll(root.descendants().filter(d => !d.lodHidden));
+            }
+        }
+
+        // Hide nodes and links outside the viewport or under a collapsed subtree,
+        // touching only elements whose culled state changed unless force is set
+        function cullToViewport(force) {
+            const { left, right, top, bottom } = visibleTreeBounds(CULL_MARGIN);
+
+            for (let i = 0; i < cullNodes.length; i++) {
+                const d = cullNodes[i];
+                const culled = d.lodHidden || d.y < left || d.y > right || d.x < top || d.x > bottom;
+                if (force || culled !== d.culled) cullNodeElements[i].classList.toggle('culled', culled);
+                d.culled = culled;
+            }
+
+            for (let i = 0; i < cullLinks.length; i++) {
+                const d = cullLinks[i];
+                const culled = d.target.lodHidden ||
+                    d.target.y < left || d.source.y > right ||
+                    Math.max(d.source.x, d.target.x) < top || Math.min(d.source.x, d.target.x) > bottom;
+                if (force || culled !== d.culled) cullLinkElements[i].classList.toggle('culled', culled);
+                d.culled = culled;
+            }
+        }
+
+        // Tree container size, measured once so zoom frames don't force a layout;
+        // cleared by the window resize handler
+        let containerSize = null;
+        function getContainerSize() {
+            if (!containerSize) {
+                const container = document.querySelector('.tree-container');
+                containerSize = { width: container.clientWidth, height: container.clientHeight };
+            }
+            return containerSize;
+        }
+
+        // Visible area of the tree group in tree coordinates, grown by margin on each side
+        function visibleTreeBounds(margin) {
+            const { width, height } = getContainerSize();
+            const t = viewTransform;
+            // Screen x maps to d.y and screen y to d.x (the tree grows left to right)
+            return {
+                left: -t.x / t.k - margin,
+                right: (width - t.x) / t.k + margin,
+                top: -t.y / t.k - margin,
+                bottom: (height - t.y) / t.k + margin
+            };
+        }
+
+        // Canvas can't resolve CSS custom properties, so look each var(--x) up once
+        const resolvedColors = new Map();
+        function resolveColor(color) {
+            const match = /^var\((--[\w-]+)\)$/.exec(color);
+            if (!match) return color;
+            let resolved = resolvedColors.get(match[1]);
+            if (resolved === undefined) {
+                resolved = getComputedStyle(document.documentElement).getPropertyValue(match[1]).trim();
+                resolvedColors.set(match[1], resolved);
+            }
+            return resolved;
+        }
+
+        // Paint all tree links and nodes to the canvas when zoomed out past OVERVIEW_SCALE,
+        // batching each stroke/fill color into a single path
+        function drawOverview() {
+            if (!overviewContext || !root) return;
+
+            const overview = viewTransform.k < OVERVIEW_SCALE;
+            svg.classed('overview', overview);
+
+            // The canvas fills the tree container
+            const canvas = overviewCanvas;
+            const ctx = overviewContext;
+            const ratio = window.devicePixelRatio || 1;
+            const width = Math.round(getContainerSize().width * ratio);
+            const height = Math.round(getContainerSize().height * ratio);
+            if (canvas.width !== width || canvas.height !== height) {
+                canvas.width = width;
+                canvas.height = height;
+            }
+            ctx.setTransform(1, 0, 0, 1, 0, 0);
+            ctx.clearRect(0, 0, width, height);
+            if (!overview) return;
+
+            const t = viewTransform;
+            const { left, right, top, bottom } = visibleTreeBounds(NODE_SPACING);
+            ctx.setTransform(ratio * t.k, 0, 0, ratio * t.k, ratio * t.x, ratio * t.y);
+
+            const linkBatches = new Map();
+            const nodeBatches = new Map();
+            root.eachBefore(d => {
+                if (d.lodHidden) return;
+                if (d.parent && d.y >= left && d.parent.y <= right &&
+                    Math.max(d.x, d.parent.x) >= top && Math.min(d.x, d.parent.x) <= bottom) {
+                    const key = (d.pathColor || 'var(--border)') + '|' + (d.pathWidth || 1);
+                    const batch = linkBatches.get(key);
+                    if (batch) batch.push(d); else linkBatches.set(key, [d]);
+                }
+                if (d.y >= left && d.y <= right && d.x >= top && d.x <= bottom) {
+                    const fill = nodeFill(d);
+                    const batch = nodeBatches.get(fill);
+                    if (batch) batch.push(d); else nodeBatches.set(fill, [d]);
+                }
+            });
+
+            linkBatches.forEach((targets, key) => {
+                const [color, lineWidth] = key.split('|');
+                ctx.beginPath();
+                targets.forEach(d => {
+                    const s = d.parent;
+                    const midY = (s.y + d.y) / 2;
+                    ctx.moveTo(s.y, s.x);
+                    ctx.bezierCurveTo(midY, s.x, midY, d.x, d.y, d.x);
+                });
+                ctx.strokeStyle = resolveColor(color);
+                ctx.lineWidth = +lineWidth;
+                ctx.stroke();
+            });
+
+            nodeBatches.forEach((batch, fill) => {
+                ctx.beginPath();
+                batch.forEach(d => {
+                    const r = nodeRadius(d);
+                    ctx.moveTo(d.y + r, d.x);
+                    ctx.arc(d.y, d.x, r, 0, 2 * Math.PI);
+                });
+                ctx.fillStyle = resolveColor(fill);
+                ctx.fill();
+            });
+
+            // Reference edges paint over the nodes, as in the SVG; one path per edge type
+            ctx.globalAlpha = currentViewMode === 'path' ? 0.1 : 0.6;
+            ctx.lineWidth = 1.5;
+            Object.keys(EDGE_DASHES).forEach(type => {
+                ctx.beginPath();
+                for (let i = 0; i < edgeCurveTypes.length; i++) {
+                    if (edgeCurveTypes[i] !== type) continue;
+                    const o = i * EDGE_CURVE_STRIDE;
+                    const x0 = edgeCurves[o], y0 = edgeCurves[o + 1];
+                    const cx = edgeCurves[o + 2], cy = edgeCurves[o + 3];
+                    const x1 = edgeCurves[o + 4], y1 = edgeCurves[o + 5];
+                    // The curve stays inside the box around its end and control points
+                    if (Math.max(x0, cx, x1) < left || Math.min(x0, cx, x1) > right ||
+                        Math.max(y0, cy, y1) < top || Math.min(y0, cy, y1) > bottom) continue;
+                    ctx.moveTo(x0, y0);
+                    ctx.quadraticCurveTo(cx, cy, x1, y1);
+                }
+                ctx.setLineDash(EDGE_DASHES[type]);
+                ctx.strokeStyle = resolveColor(`var(--edge-${type})`);
+                ctx.stroke();
+            });
+            ctx.setLineDash([]);
+            ctx.globalAlpha = 1;
+        }
+
+        // Nearest drawn node under the pointer while the canvas overview is showing
+        function overviewNodeAt(event) {
+            if (!nodeQuadtree || viewTransform.k >= OVERVIEW_SCALE) return null;
+            const [px, py] = d3.pointer(event, svg.node());
+            const t = viewTransform;
+            return nodeQuadtree.find(t.invertX(px), t.invertY(py), OVERVIEW_HIT_RADIUS / t.k) || null;
+        }
+
+        // Drawn reference edge with its midpoint nearest the pointer. Edges are dimmed
+        // and inert in path view.
+        function edgeAt(event) {
+            if (!edgeQuadtree || currentViewMode === 'path') return null;
+            const [px, py] = d3.pointer(event, svg.node());
+            const t = viewTransform;
+            return edgeQuadtree.find(t.invertX(px), t.invertY(py), EDGE_HIT_RADIUS / t.k) || null;
+        }
+
+        function setHoverEdge(item, event, hideEdgeTooltip = true) {
+            if (item === hoverEdge) return;
+            if (hoverEdge) {
+                hoverEdge.element.classList.remove('hover-edge');
+                if (hideEdgeTooltip) hideTooltip();
+            }
+            hoverEdge = item;
+            if (item) {
+                item.element.classList.add('hover-edge');
+                showEdgeTooltip(event, item.edge);
+            }
+        }
+
+        function showEdgeTooltip(event, edge) {
+            const tooltip = document.getElementById('tooltip');
+            tooltip.innerHTML = `
+                <div class="tooltip-title">Reference</div>
+                <div class="tooltip-row">
+                    <span class="tooltip-label">From</span>
+                    <span class="tooltip-value" style="word-break: break-all">${edge.source}</span>
+                </div>
+                <div class="tooltip-row">
+                    <span class="tooltip-label">To</span>
+                    <span class="tooltip-value" style="word-break: break-all">${edge.target}</span>
+                </div>
+                <div class="tooltip-row">
+                    <span class="tooltip-label">Type</span>
+                    <span class="tooltip-value">${edge.type === 'agent-doc' ? 'Agent doc' : edge.type === 'directory' ? 'Directory' : 'File'}</span>
+                </div>
+            `;
+            tooltip.style.display = 'block';
+            tooltip.style.left = (event.pageX + 12) + 'px';
+            tooltip.style.top = (event.pageY - 10) + 'px';
+        }
+
+        // Class list for a node, written as one attribute per render; includes the
+        // path selection so update() keeps it, while referenced/culled are toggled separately
+        function classFor(d) {
+            let classes = 'node';
+            if (d.data.type === 'directory') classes += ' directory';
+            else classes += ' file';
+            if (d.data.isAgentDoc) classes += ' agent-doc';
+            if (d._children) classes += ' collapsed';
+            if (selectedPath !== null && d.highlighted) {
+                classes += ' highlighted';
+                if (d.data.path === selectedPath) classes += ' selected';
+            }
+            return classes;
+        }
+
+        // Node circle radius by shape; the <use> symbols are built from the same table
+        const NODE_SHAPE_RADII = { 'agent-doc': 7, directory: 5, file: 4 };
+
+        function nodeShape(d) {
+            return d.data.isAgentDoc ? 'agent-doc' : (d.data.type === 'directory' ? 'directory' : 'file');
+        }
+
+        function nodeRadius(d) {
+            return NODE_SHAPE_RADII[nodeShape(d)];
+        }
+
+        function nodeFill(d) {
+            if (d.data.isAgentDoc) {
+                return TOKEN_BUCKET_COLORS[agentDocBucket[d.data.docIndex]];
+            }
+            return d.data.type === 'directory' ? 'var(--bg-tertiary)' : 'var(--text-muted)';
+        }
+
+        // Wrap a node handler for delegation: call it with the datum of the g.node the
+        // event came from, ignoring events from links and edges
+        function nodeEventHandler(handler) {
+            return (event) => {
+                const nodeEl = event.target.closest('g.node');
+                if (nodeEl) handler(event, d3.select(nodeEl).datum());
+            };
+        }
+
+        function onNodeClick(event, d) {
+            event.stopPropagation();
+            // Single click = select for random walk
+            if (d.data.type === 'directory') {
+                selectPath(d.data.path);
+            } else if (d.data.isAgentDoc) {
+                if (selectedAgentDoc === d.data.path) {
+                    clearAllHighlighting();  // Deselect if already selected
+                } else {
+                    selectAgentDoc(d.data.path);
+                }
+            }
+        }
+
+        function onNodeDblClick(event, d) {
+            event.stopPropagation();
+            // Double click = toggle expand/collapse (directories only)
+            if (d.data.type === 'directory') {
+                if (d.children) {
+                    d._children = d.children;
+                    d.children = null;
+                } else if (d._children) {
+                    d.children = d._children;
+                    d._children = null;
+                }
+                update(d);
+                scheduleRender(renderEdges);
+            }
+        }
+
+        function diagonal(s, d) {
+            return `M ${s.y} ${s.x}
+                    C ${(s.y + d.y) / 2} ${s.x},
+                      ${(s.y + d.y) / 2} ${d.x},
+                      ${d.y} ${d.x}`;
+        }
 
         // Render reference edges
-        function renderEdges() {{
-            // Remove existing edges
-            g.selectAll('.edge').remove();
+        // SVG path data for an edge's quadratic curve, built by plain concatenation
+        function edgeD(x0, y0, cx, cy, x1, y1) {
+            return 'M ' + x0 + ' ' + y0 + ' Q ' + cx + ' ' + cy + ', ' + x1 + ' ' + y1;
+        }
+
+        // Runs inside a frame (initTree, applyLevelChange) or through scheduleRender(), so
+        // several tree changes in one frame redraw the edges once
+        function renderEdges() {
+            setHoverEdge(null);
+            edgeQuadtree = null;
+            edgeCurveTypes = [];
+            edgeElements.clear();
 
             const edges = EDGES_DATA.edges || [];
-            if (edges.length === 0) return;
-
-            // Get visible nodes and their positions
-            const visibleNodes = new Map();
-            root.descendants().forEach(d => {{
-                visibleNodes.set(d.data.path, {{ x: d.x, y: d.y }});
-            }});
-
-            // Draw edges
-            edges.forEach(edge => {{
-                const sourcePos = visibleNodes.get(edge.source);
-                const targetPos = visibleNodes.get(edge.target);
-
-                if (sourcePos && targetPos) {{
-                    const path = g.append('path')
-                        .attr('class', `edge ${{edge.type}}`)
-                        .attr('d', `M ${{sourcePos.y + 8}} ${{sourcePos.x}}
-                                   Q ${{(sourcePos.y + targetPos.y) / 2 + 50}} ${{(sourcePos.x + targetPos.x) / 2}},
-                                     ${{targetPos.y - 12}} ${{targetPos.x}}`)
-                        .attr('marker-end', `url(#arrow-${{edge.type}})`)
-                        .attr('data-source', edge.source)
-                        .attr('data-target', edge.target);
-
-                    // Add tooltip on hover
-                    path.on('mouseover', (event) => {{
-                        const tooltip = document.getElementById('tooltip');
-                        tooltip.innerHTML = `
-                            <div class="tooltip-title">Reference</div>
-                            <div class="tooltip-row">
-                                <span class="tooltip-label">From</span>
-                                <span class="tooltip-value" style="word-break: break-all">${{edge.source}}</span>
-                            </div>
-                            <div class="tooltip-row">
-                                <span class="tooltip-label">To</span>
-                                <span class="tooltip-value" style="word-break: break-all">${{edge.target}}</span>
-                            </div>
-                            <div class="tooltip-row">
-                                <span class="tooltip-label">Type</span>
-                                <span class="tooltip-value">${{edge.type === 'agent-doc' ? 'Agent doc' : edge.type === 'directory' ? 'Directory' : 'File'}}</span>
-                            </div>
-                        `;
-                        tooltip.style.display = 'block';
-                        tooltip.style.left = (event.pageX + 12) + 'px';
-                        tooltip.style.top = (event.pageY - 10) + 'px';
-                    }})
-                    .on('mouseout', hideTooltip);
-                }}
-            }});
-        }}
+            if (edges.length === 0) {
+                edgeCurves = new Float32Array(0);
+                drawOverview();
+                return;
+            }
+
+            // Lay out each edge with both endpoints visible (looked up in update()'s
+            // visibleNodeById), collecting its curve for the canvas overview and its
+            // midpoint for hover hit-testing
+            const hitItems = [];
+            const curves = new Float32Array(edges.length * EDGE_CURVE_STRIDE);
+            edges.forEach((edge, index) => {
+                const sourcePos = visibleNodeById[edge.sourceId];
+                const targetPos = visibleNodeById[edge.targetId];
+
+                if (sourcePos && targetPos) {
+                    const x0 = sourcePos.y + 8, y0 = sourcePos.x;
+                    const cx = (sourcePos.y + targetPos.y) / 2 + 50, cy = (sourcePos.x + targetPos.x) / 2;
+                    const x1 = targetPos.y - 12, y1 = targetPos.x;
+
+                    curves.set([x0, y0, cx, cy, x1, y1], edgeCurveTypes.length * EDGE_CURVE_STRIDE);
+                    edgeCurveTypes.push(edge.type);
+
+                    // Point at t = 0.5 on the quadratic curve
+                    hitItems.push({
+                        edge,
+                        index,
+                        path: edgeD(x0, y0, cx, cy, x1, y1),
+                        x: (x0 + 2 * cx + x1) / 4,
+                        y: (y0 + 2 * cy + y1) / 4,
+                    });
+                }
+            });
+
+            // Keyed join on the edge's position in EDGES_DATA (source/target pairs can
+            // repeat): edges that stay drawn only get their curve rewritten
+            g.selectAll('path.edge')
+                .data(hitItems, item => item.index)
+                .join(enter => enter.append('path')
+                    .attr('class', ({ edge }) => `edge ${edge.type}`)
+                    .attr('marker-end', ({ edge }) => `url(#arrow-${edge.type})`)
+                    .attr('data-source', ({ edge }) => edge.source)
+                    .attr('data-target', ({ edge }) => edge.target))
+                .each(function(item) {
+                    // Edges whose endpoints didn't move keep their parsed path
+                    if (this.getAttribute('d') !== item.path) this.setAttribute('d', item.path);
+                })
+                .classed('highlighted-edge', ({ edge }) => edge.source === selectedAgentDoc)
+                .each(function(item) {
+                    item.element = this;
+                    edgeElements.set(item.edge, this);
+                });
+
+            edgeQuadtree = d3.quadtree()
+                .x(item => item.x)
+                .y(item => item.y)
+                .addAll(hitItems);
+
+            edgeCurves = curves.subarray(0, edgeCurveTypes.length * EDGE_CURVE_STRIDE);
+            drawOverview();
+        }
+
+        // Pause the selected node's pulse animation while it is outside the viewport
+        let pulseObserver = null;
+
+        function observeSelectedPulse() {
+            if (!window.IntersectionObserver) return;
+            if (!pulseObserver) {
+                pulseObserver = new IntersectionObserver(entries => {
+                    entries.forEach(entry => {
+                        entry.target.style.animationPlayState = entry.isIntersecting ? 'running' : 'paused';
+                    });
+                });
+            }
+            pulseObserver.disconnect();
+            // An exiting copy of the selected node may still be in the DOM mid-transition
+            g.selectAll('g.node.selected .glow').each(function() { pulseObserver.observe(this); });
+        }
 
         // Path selection
-        function selectPath(path) {{
+        function selectPath(path) {
             selectedPath = path;
 
-            // Highlight path in tree
-            root.descendants().forEach(d => {{
+            // Highlight path in tree, clearing the previous chain even where it is
+            // collapsed out of view so it doesn't come back highlighted
+            highlightedChain.forEach(d => {
                 d.highlighted = false;
-            }});
+            });
+            highlightedChain = [];
 
             // Highlight ancestors
-            let current = root.descendants().find(d => d.data.path === path);
-            while (current) {{
+            let current = nodesByPath.get(path);
+            while (current) {
                 current.highlighted = true;
+                highlightedChain.push(current);
                 current = current.parent;
-            }}
+            }
 
-            // Update node classes
-            g.selectAll('g.node')
-                .classed('highlighted', d => d.highlighted)
-                .classed('selected', d => d.data.path === path);
-
-            g.selectAll('path.link')
-                .classed('highlighted', d => d.target.highlighted);
+            // Tree classes are written in the next frame, once however many selections
+            // arrive before it
+            scheduleRender(renderPathHighlight);
 
             // Update sidebar
             const pathEl = document.getElementById('selected-path');
@@ -1791,69 +2665,79 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
 
             pathEl.textContent = path === '.' ? (TREE_DATA.tree?.name || '(root)') : path;
 
-            const {{ total, breakdown }} = getCumulativeTokens(path);
+            const { total, breakdown } = getCumulativeTokens(path);
             tokensEl.textContent = total.toLocaleString();
             tokensEl.style.color = getTokenColor(total);
 
-            if (breakdown.length > 0) {{
+            if (breakdown.length > 0) {
                 chainEl.innerHTML = breakdown.map(item => `
                     <div class="path-chain-item">
-                        <span class="file">${{item.file}}</span>
-                        <span class="tokens" style="color: ${{getTokenColor(item.tokens)}}">${{item.tokens}}</span>
+                        <span class="file">${item.file}</span>
+                        <span class="tokens" style="color: ${getTokenColor(item.tokens)}">${item.tokens}</span>
                     </div>
                 `).join('');
-            }} else {{
+            } else {
                 chainEl.innerHTML = '<div style="color: var(--text-muted); font-size: 11px;">No agent docs in path</div>';
-            }}
+            }
 
             // Show/hide copy context chain button (in section header)
             const copyBtn = document.getElementById('copy-context-chain-btn');
             copyBtn.style.display = breakdown.length > 0 ? 'inline-block' : 'none';
             copyBtn.textContent = '📋';  // Reset button text
             copyBtn.classList.remove('copied');
-        }}
+        }
+
+        // Apply the selected path's highlight to the rendered nodes and links
+        function renderPathHighlight() {
+            const path = selectedPath;
+            g.selectAll('g.node')
+                .classed('highlighted', d => path !== null && d.highlighted)
+                .classed('selected', d => d.data.path === path);
+            observeSelectedPulse();
+
+            g.selectAll('path.link')
+                .classed('highlighted', d => path !== null && d.target.highlighted);
+        }
 
         // Clear all highlighting
-        function clearAllHighlighting() {{
+        function clearAllHighlighting() {
             selectedAgentDoc = null;
             g.selectAll('g.node').classed('referenced', false);
-            g.selectAll('.edge').classed('highlighted-edge', false);
+            g.selectAll('.edge.highlighted-edge').classed('highlighted-edge', false);
             document.getElementById('referenced-files-section').style.display = 'none';
             updateDepthDisplay();
-        }}
+        }
 
         // Select agent doc and highlight referenced files
-        function selectAgentDoc(path) {{
+        function selectAgentDoc(path) {
             // Clear previous highlighting
             clearAllHighlighting();
 
             selectedAgentDoc = path;
             updateDepthDisplay();
-            const edges = EDGES_DATA.edges || [];
-
             // Find all edges from this agent doc
-            const referencedPaths = edges
-                .filter(e => e.source === path)
-                .map(e => e.target);
+            const outgoing = edgesBySource.get(path) || [];
+            const referencedPaths = outgoing.map(e => e.target);
 
-            if (referencedPaths.length === 0) {{
+            if (referencedPaths.length === 0) {
                 // No references, just select the parent directory for random walk
-                const node = root.descendants().find(d => d.data.path === path);
-                if (node && node.parent) {{
+                const node = nodesByPath.get(path);
+                if (node && node.parent) {
                     selectPath(node.parent.data.path);
-                }}
+                }
                 return;
-            }}
+            }
 
             // Highlight referenced nodes
+            const referencedSet = new Set(referencedPaths);
             g.selectAll('g.node')
-                .classed('referenced', d => referencedPaths.includes(d.data.path));
+                .classed('referenced', d => referencedSet.has(d.data.path));
 
             // Highlight edges from this agent doc
-            g.selectAll('.edge')
-                .classed('highlighted-edge', function() {{
-                    return d3.select(this).attr('data-source') === path;
-                }});
+            outgoing.forEach(edge => {
+                const element = edgeElements.get(edge);
+                if (element) element.classList.add('highlighted-edge');
+            });
 
             // Update sidebar
             const section = document.getElementById('referenced-files-section');
@@ -1863,119 +2747,164 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
 
             section.style.display = 'block';
             pathEl.textContent = path;
-            countEl.innerHTML = `<span style="color: var(--accent); font-weight: 600;">${{referencedPaths.length}}</span> <span style="color: var(--text-secondary);">referenced files</span>`;
+            countEl.innerHTML = `<span style="color: var(--accent); font-weight: 600;">${referencedPaths.length}</span> <span style="color: var(--text-secondary);">referenced files</span>`;
 
             listEl.innerHTML = referencedPaths.map(refPath => `
                 <div class="path-chain-item">
-                    <span class="file">${{refPath}}</span>
+                    <span class="file">${refPath}</span>
                 </div>
             `).join('');
-        }}
+        }
 
         // Expand tree to a specific path
-        function expandToPath(path) {{
+        function expandToPath(path) {
             const parts = path.split('/');
             let currentPath = '';
 
-            for (let i = 0; i < parts.length - 1; i++) {{
+            for (let i = 0; i < parts.length - 1; i++) {
                 currentPath = currentPath ? currentPath + '/' + parts[i] : parts[i];
-                const node = root.descendants().find(d => d.data.path === currentPath);
-                if (node && node._children) {{
+                const node = nodesByPath.get(currentPath);
+                if (node && node._children) {
                     node.children = node._children;
                     node._children = null;
-                }}
-            }}
+                    // Index the revealed subtree so the next segment finds its node
+                    node.children.forEach(c => c.each(n => {
+                        if (!nodesByPath.has(n.data.path)) nodesByPath.set(n.data.path, n);
+                    }));
+                }
+            }
 
             update(root);
-            renderEdges();
-            updateEdgeVisibility();
-        }}
+            scheduleRender(renderEdges);
+        }
 
         // Render agent docs ranking
-        function renderAgentDocsRanking() {{
+        // The agent docs ranking is first built in idle time, SIDEBAR_SLICE rows per
+        // callback, so a large repo's sidebar doesn't hold up the tree's first paint.
+        // Renders in between show the rows built so far.
+        const SIDEBAR_SLICE = 50;
+        let rankingRowLimit = SIDEBAR_SLICE;
+
+        function requestIdle(callback) {
+            if (window.requestIdleCallback) return requestIdleCallback(callback);
+            return setTimeout(callback, 0);
+        }
+
+        function buildSidebar() {
+            renderAgentDocsRanking();
+            if (rankingRowLimit < agentDocTokens.size) {
+                rankingRowLimit += SIDEBAR_SLICE;
+                requestIdle(buildSidebar);
+            } else {
+                rankingRowLimit = Infinity;
+            }
+        }
+
+        function renderAgentDocsRanking() {
             const container = document.getElementById('agent-docs-ranking');
 
             // Get all agent docs and sort by token count descending, filtered by doc type
-            const sortedDocs = Array.from(agentDocTokens.entries())
-                .filter(([path, tokens]) => matchesDocTypeFilter(path))
-                .sort((a, b) => b[1] - a[1]);
+            const sortedDocs = getFilteredAgentDocs();
 
-            if (sortedDocs.length === 0) {{
+            if (sortedDocs.length === 0) {
                 const filterMsg = activeDocTypeFilter === 'all'
                     ? 'No agent docs found'
-                    : `No ${{activeDocTypeFilter === 'claude' ? 'CLAUDE.md' : 'AGENTS.md'}} files found`;
-                container.innerHTML = `<div style="color: var(--text-muted); font-size: 11px; padding: 8px;">${{filterMsg}}</div>`;
+                    : `No ${activeDocTypeFilter === 'claude' ? 'CLAUDE.md' : 'AGENTS.md'} files found`;
+                container.innerHTML = `<div style="color: var(--text-muted); font-size: 11px; padding: 8px;">${filterMsg}</div>`;
                 return;
-            }}
-
-            container.innerHTML = sortedDocs.map(([path, tokens]) => `
-                <div class="ranking-item" data-path="${{path}}">
-                    <span class="path" title="${{path}}">${{path}}</span>
-                    <span class="tokens" style="color: ${{getTokenColor(tokens)}}">${{tokens.toLocaleString()}}</span>
-                </div>
-            `).join('');
-
-            // Add click handlers
-            container.querySelectorAll('.ranking-item').forEach(item => {{
-                item.addEventListener('click', () => {{
-                    const path = item.dataset.path;
-                    expandToPath(path);
-                    selectAgentDoc(path);
-                }});
-            }});
-        }}
+            }
+
+            // Keyed join: rows are created once per doc and only their token cell
+            // is rewritten on later renders. Clicks are delegated to the container
+            // (onAgentDocRankingClick).
+            if (!container.querySelector('.ranking-item')) container.innerHTML = '';
+            d3.select(container)
+                .selectAll('.ranking-item')
+                .data(sortedDocs.slice(0, rankingRowLimit), ([path]) => path)
+                .join(enter => {
+                    const item = enter.append('div')
+                        .attr('class', 'ranking-item')
+                        .attr('data-path', ([path]) => path);
+                    item.append('span')
+                        .attr('class', 'path')
+                        .attr('title', ([path]) => path)
+                        .text(([path]) => path);
+                    item.append('span').attr('class', 'tokens');
+                    return item;
+                })
+                .select('.tokens')
+                .style('color', ([, tokens]) => getTokenColor(tokens))
+                .text(([, tokens]) => tokens.toLocaleString());
+        }
+
+        function onAgentDocRankingClick(event) {
+            const item = event.target.closest('.ranking-item');
+            if (!item) return;
+            const path = item.dataset.path;
+            expandToPath(path);
+            selectAgentDoc(path);
+        }
+
+        // Re-color the rendered ranking rows from their bound data
+        function recolorAgentDocsRanking() {
+            const green = tokenThresholds.green;
+            const yellow = tokenThresholds.yellow;
+            d3.select('#agent-docs-ranking')
+                .selectAll('.ranking-item .tokens')
+                .style('color', ([, t]) => TOKEN_BUCKET_COLORS[t < green ? 0 : t < yellow ? 1 : 2]);
+        }
 
         // Tooltip
-        function showTooltip(event, d) {{
+        function showTooltip(event, d) {
             const tooltip = document.getElementById('tooltip');
 
-            let content = `<div class="tooltip-title">${{d.data.path}}</div>`;
+            let content = `<div class="tooltip-title">${d.data.path}</div>`;
 
-            if (d.data.isAgentDoc) {{
+            if (d.data.isAgentDoc) {
                 content += `
                     <div class="tooltip-row">
                         <span class="tooltip-label">Tokens</span>
-                        <span class="tooltip-value" style="color: ${{getTokenColor(d.data.tokens || 0)}}">${{(d.data.tokens || 0).toLocaleString()}}</span>
+                        <span class="tooltip-value" style="color: ${getTokenColor(d.data.tokens || 0)}">${(d.data.tokens || 0).toLocaleString()}</span>
                     </div>
                 `;
-            }} else if (d.data.type === 'directory') {{
+            } else if (d.data.type === 'directory') {
                 const childCount = (d.children || d._children || []).length;
                 content += `
                     <div class="tooltip-row">
                         <span class="tooltip-label">Children</span>
-                        <span class="tooltip-value">${{childCount}}</span>
+                        <span class="tooltip-value">${childCount}</span>
                     </div>
                 `;
-                if (d._children) {{
+                if (d._children) {
                     content += `<div style="color: var(--text-muted); font-size: 11px; margin-top: 4px;">Double-click to expand</div>`;
-                }}
-            }}
+                }
+            }
 
             tooltip.innerHTML = content;
             tooltip.style.display = 'block';
             tooltip.style.left = (event.pageX + 12) + 'px';
             tooltip.style.top = (event.pageY - 10) + 'px';
-        }}
+        }
 
-        function hideTooltip() {{
+        function hideTooltip() {
             document.getElementById('tooltip').style.display = 'none';
-        }}
+        }
 
         // Control functions
-        function resetView() {{
+        function resetView() {
             // Reset to initial depth
-            currentVisibleDepth = 2;
+            currentVisibleDepth = targetVisibleDepth = 2;
 
-            root.descendants().forEach(d => {{
-                if (d._children) {{
+            root.descendants().forEach(d => {
+                if (d._children) {
                     d.children = d._children;
                     d._children = null;
-                }}
-                if (d.depth >= currentVisibleDepth && d.children) {{
+                }
+                if (d.depth >= currentVisibleDepth && d.children) {
                     d._children = d.children;
                     d.children = null;
-                }}
-            }});
+                }
+            });
             selectedPath = null;
             document.getElementById('selected-path').textContent = 'Click a directory...';
             document.getElementById('path-tokens').textContent = '-';
@@ -1986,6 +2915,7 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             copyBtn.textContent = '📋';
             copyBtn.classList.remove('copied');
             g.selectAll('g.node').classed('highlighted', false).classed('selected', false);
+            observeSelectedPulse();
             g.selectAll('path.link').classed('highlighted', false);
             // Clear agent doc highlighting
             clearAllHighlighting();
@@ -1993,13 +2923,21 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
             svg.transition().duration(500).call(window.zoomBehavior.transform, d3.zoomIdentity);
             initialRenderComplete = false;
             update(root);
-            renderEdges();
-            updateEdgeVisibility();
+            scheduleRender(renderEdges);
             updateDepthDisplay();
-        }}
-
-        function fitToView(zoomFactor = 0.9) {{
-            const bounds = g.node().getBBox();
+        }
+
+        function fitToView(zoomFactor = 0.9) {
+            // Bounds come from the layout: getBBox() would skip culled and overview-hidden
+            // nodes. Pad for the root label on the left and leaf labels on the right.
+            let maxY = 0;
+            root.each(d => { if (d.y > maxY) maxY = d.y; });
+            const bounds = {
+                x: -80,
+                y: root.spanMin - 20,
+                width: maxY + 200,
+                height: root.spanMax - root.spanMin + 40
+            };
             const container = document.querySelector('.tree-container');
             const fullWidth = container.clientWidth;
             const fullHeight = container.clientHeight;
@@ -2012,37 +2950,83 @@ def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | N
                 .scale(scale)
                 .translate(-bounds.x - bounds.width / 2, -bounds.y - bounds.height / 2);
             svg.transition().duration(500).call(window.zoomBehavior.transform, transform);
-        }}
-
-        // Initialize
-        renderHeaderStats();
-        initTree();
-        // Center tree in viewport on load (more zoomed out)
-        setTimeout(() => fitToView(0.175), 100);
-        renderAgentDocsRanking();
-
-        // Initialize path weights features if data is available
-        if (PATH_WEIGHTS_DATA) {{
-            document.getElementById('view-toggle').style.display = 'flex';
-            renderHeaviestPaths();
-        }}
-
-        // Initialize threshold input listeners
-        document.getElementById('threshold-green').addEventListener('input', updateThresholds);
-        document.getElementById('threshold-yellow').addEventListener('input', updateThresholds);
-
-        // Initialize legend labels
-        updateLegendLabels();
+        }
+
+        function startVisualization() {
+            indexData();
+            renderHeaderStats();
+            initTree();
+            // Center tree in viewport on load (more zoomed out)
+            setTimeout(() => fitToView(0.175), 100);
+
+            // Initialize path weights features if data is available
+            if (PATH_WEIGHTS_DATA) {
+                document.getElementById('view-toggle').style.display = 'flex';
+            }
+
+            // Fill the sidebar rankings once the tree has painted
+            requestIdle(() => {
+                if (PATH_WEIGHTS_DATA) renderHeaviestPaths();
+                buildSidebar();
+            });
+
+            // Sidebar list clicks are handled once at the container
+            document.getElementById('heaviest-paths-list').addEventListener('click', onHeaviestPathClick);
+            document.getElementById('agent-docs-ranking').addEventListener('click', onAgentDocRankingClick);
+
+            // Initialize threshold input listeners
+            document.getElementById('threshold-green').addEventListener('input', () => scheduleRender(updateThresholds));
+            document.getElementById('threshold-yellow').addEventListener('input', () => scheduleRender(updateThresholds));
+
+            // Initialize legend labels
+            updateLegendLabels();
 
-        // Handle window resize
-        window.addEventListener('resize', () => {{
-            // CSS percentage sizing handles resize automatically
-        }});
+            // Handle window resize
+            window.addEventListener('resize', () => {
+                // CSS percentage sizing handles the SVG; re-measure for culling and the canvas
+                containerSize = null;
+                drawOverview();
+            });
+        }
+
+        // Initialize once every payload is decoded (plain JSON ones resolve immediately)
+        Promise.all([TREE_PAYLOAD, EDGES_PAYLOAD, PATH_WEIGHTS_PAYLOAD])
+            .then(([treeData, edgesData, pathWeightsData]) => {
+                TREE_DATA = treeData;
+                EDGES_DATA = edgesData;
+                PATH_WEIGHTS_DATA = pathWeightsData;
+                startVisualization();
+            })
+            .catch(err => {
+                console.error('Failed to load embedded data:', err);
+                document.getElementById('header-stats').textContent = `Failed to load embedded data: ${err.message}`;
+            });
     </script>
 </body>
 </html>'''
 
 
+def write_html(out: TextIO, tree_data: dict, edges_data: dict, path_weights_data: dict | None = None,
+               compress: bool = True) -> None:
+    """Stream the self-contained HTML visualization to a text file object."""
+    tree_data, edges_data = drop_derivable_paths(*assign_node_ids(tree_data, edges_data))
+    out.write(HTML_PROLOGUE)
+    out.write(to_script_payload(tree_data, compress))
+    out.write(HTML_TREE_TO_EDGES)
+    out.write(to_script_payload(edges_data, compress))
+    out.write(HTML_EDGES_TO_WEIGHTS)
+    out.write(to_script_payload(path_weights_data, compress) if path_weights_data else "null")
+    out.write(HTML_EPILOGUE)
+
+
+def generate_html(tree_data: dict, edges_data: dict, path_weights_data: dict | None = None,
+                  compress: bool = True) -> str:
+    """Generate self-contained HTML with embedded D3.js visualization."""
+    out = io.StringIO()
+    write_html(out, tree_data, edges_data, path_weights_data, compress)
+    return out.getvalue()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate interactive D3.js HTML visualization"
@@ -2057,7 +3041,7 @@ def main():
         "--edges", "-e",
         type=str,
         required=True,
-        help="Input edges JSON file from sub-agent analysis",
+        help="Input edges JSON (or .ndjson) file from merge_edges.py",
     )
     parser.add_argument(
         "--path-weights", "-p",
@@ -2075,22 +3059,25 @@ def main():
         action="store_true",
         help="Open visualization in browser",
     )
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Embed data as plain JSON even when large (for browsers without DecompressionStream)",
+    )
 
     args = parser.parse_args()
 
     # Load input files
     tree_data = load_json(args.tree)
-    edges_data = load_json(args.edges)
+    edges_data = load_edges(args.edges)
     path_weights_data = load_json(args.path_weights) if args.path_weights else None
 
-    # Generate HTML
-    html = generate_html(tree_data, edges_data, path_weights_data)
-
-    # Create output directory and write file
+    # Create output directory and stream the HTML into it
     output_dir = Path(args.output)
     output_dir.mkdir(parents=True, exist_ok=True)
     output_file = output_dir / "index.html"
-    output_file.write_text(html)
+    with open(output_file, "w", encoding="utf-8") as out:
+        write_html(out, tree_data, edges_data, path_weights_data, compress=not args.no_compress)
 
     print(f"Visualization written to {output_file}", file=sys.stderr)
 